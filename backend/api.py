@@ -1,9 +1,39 @@
+import logging
+import os
+import queue
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from database import close_db_connections
+from engines.http import close_http_client
 from routers import subreddits_router, relationships_router, analysis_router
 
-app = FastAPI(title="Discovered Labs API", description="API for Reddit community discovery")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Route engine logs through a background thread, and close pooled connections on shutdown."""
+    # The handler only enqueues records, so logging from the event loop never waits on stderr
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, logging.StreamHandler())
+    engines_log = logging.getLogger("engines")
+    # The root default (WARNING) would drop the pipeline's progress messages
+    engines_log.setLevel(os.getenv("ENGINES_LOG_LEVEL", "INFO").upper())
+    queue_handler = QueueHandler(log_queue)
+    engines_log.addHandler(queue_handler)
+    listener.start()
+    try:
+        yield
+    finally:
+        engines_log.removeHandler(queue_handler)
+        listener.stop()
+        await close_db_connections()
+        await close_http_client()
+
+
+app = FastAPI(title="Discovered Labs API", description="API for Reddit community discovery", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -1,14 +1,62 @@
+import asyncio
 import aiosqlite
 from contextlib import asynccontextmanager
+from pathlib import Path
 
 DB_PATH = "reports/tesla.db"
 
+# Idle connections kept open per database file
+POOL_SIZE = 4
+
+_pools: dict[str, asyncio.LifoQueue] = {}
+
+
+async def _connect(db_path: str) -> aiosqlite.Connection:
+    """Open a read-only connection with the read-side PRAGMAs applied."""
+    # Read-only: the committed report must not be rewritten by a request (journal_mode=WAL
+    # is stored in the file), and the API never writes through these connections
+    db = await aiosqlite.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        # busy_timeout waits out a writer's lock; mmap avoids read() syscalls on page misses
+        await db.executescript("""
+            PRAGMA query_only=ON;
+            PRAGMA busy_timeout=30000;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA mmap_size=268435456;
+        """)
+    except BaseException:
+        await db.close()
+        raise
+    return db
+
 
 @asynccontextmanager
 async def get_db_connection(db_path: str = DB_PATH):
-    """Create and return a database connection as an async context manager."""
-    db = await aiosqlite.connect(db_path)
+    """Borrow a pooled read-only database connection as an async context manager.
+
+    Connections are kept open between requests (up to POOL_SIZE idle per file), so
+    each request skips the connect and PRAGMA setup and reuses a warm page cache.
+    """
+    pool = _pools.setdefault(db_path, asyncio.LifoQueue(maxsize=POOL_SIZE))
+    try:
+        db = pool.get_nowait()
+    except asyncio.QueueEmpty:
+        db = await _connect(db_path)
+
     try:
         yield db
     finally:
-        await db.close()
+        if db.in_transaction:
+            await db.rollback()
+        try:
+            pool.put_nowait(db)
+        except asyncio.QueueFull:
+            await db.close()
+
+
+async def close_db_connections():
+    """Close every idle pooled connection."""
+    for pool in _pools.values():
+        while not pool.empty():
+            await pool.get_nowait().close()
+    _pools.clear()
@@ -13,37 +13,51 @@ from .community_finder import (
 )
 from .core import (
     aggregate_and_filter_subreddits,
+    aggregate_and_filter_subreddits_async,
     find_subreddits_via_gemini,
     find_subreddits_via_google,
+    find_subreddits_via_google_async,
 )
 from .models import SubredditDiscovery, RedditScrapeSource, SubredditPost
-from .subreddit_discovery import scrape_reddit_search
+from .ratelimit import TokenBucket, REDDIT_BUCKET
+from .subreddit_discovery import scrape_reddit_search, scrape_reddit_search_async
 from .subreddit_ranking import (
     get_relevant_posts_from_subreddit,
+    get_relevant_posts_from_subreddit_async,
     scrape_subreddit_search_page,
+    scrape_subreddit_search_stream,
 )
 from .legacy import get_relevant_posts_from_subreddit_api
 from .helpers import (
     add_jitter,
     get_random_user_agent,
     get_random_impersonate_target,
+    get_scrape_session,
+    new_scrape_async_session,
 )
 from .constants import (
     USER_AGENTS,
+    USER_AGENT_VALUES,
     IMPERSONATE_TARGETS,
     REDDIT_SEARCH_TEMPLATE,
     SUBREDDIT_SEARCH_TEMPLATE,
     GOOGLE_SEARCH_URL,
 )
 from .db import (
+    transaction,
+    flush,
     get_db,
     create_subreddits_table,
+    create_subreddits_indexes,
     insert_subreddit,
+    upsert_subreddit_score,
+    insert_subreddits,
+    insert_posts,
     select_subreddits_by_frequency,
     select_all_subreddits_ordered,
     update_relevance_score,
+    update_relevance_scores,
     delete_subreddits_by_names,
-    update_json_response_null,
     close_db,
     init_subreddits_db,
 )
@@ -53,36 +67,53 @@ __all__ = [
     "score_and_rank_subreddits",
     "score_and_rank_subreddits_async",
     "aggregate_and_filter_subreddits",
+    "aggregate_and_filter_subreddits_async",
     "find_subreddits_via_gemini",
     "find_subreddits_via_google",
+    "find_subreddits_via_google_async",
     # Models
     "SubredditDiscovery",
     "RedditScrapeSource",
     "SubredditPost",
+    # Rate limiting
+    "TokenBucket",
+    "REDDIT_BUCKET",
     # Scraping functions
     "scrape_reddit_search",
+    "scrape_reddit_search_async",
     "get_relevant_posts_from_subreddit",
+    "get_relevant_posts_from_subreddit_async",
     "get_relevant_posts_from_subreddit_api",
     "scrape_subreddit_search_page",
+    "scrape_subreddit_search_stream",
     # Helper functions
     "add_jitter",
     "get_random_user_agent",
     "get_random_impersonate_target",
+    "get_scrape_session",
+    "new_scrape_async_session",
     # Constants
     "USER_AGENTS",
+    "USER_AGENT_VALUES",
     "IMPERSONATE_TARGETS",
     "REDDIT_SEARCH_TEMPLATE",
     "SUBREDDIT_SEARCH_TEMPLATE",
     "GOOGLE_SEARCH_URL",
     # Database functions
+    "transaction",
+    "flush",
     "get_db",
     "create_subreddits_table",
+    "create_subreddits_indexes",
     "insert_subreddit",
+    "upsert_subreddit_score",
+    "insert_subreddits",
+    "insert_posts",
     "select_subreddits_by_frequency",
     "select_all_subreddits_ordered",
     "update_relevance_score",
+    "update_relevance_scores",
     "delete_subreddits_by_names",
-    "update_json_response_null",
     "close_db",
     "init_subreddits_db",
 ]
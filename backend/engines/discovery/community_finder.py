@@ -1,26 +1,48 @@
 """Community finder module for discovering and ranking subreddits."""
 
 import asyncio
-import json
+import functools
+import logging
 from pathlib import Path
 from typing import List
 
-from .db import init_subreddits_db
-from .models import SubredditDiscovery, RedditScrapeSource
-from .subreddit_ranking import get_relevant_posts_from_subreddit
+import orjson
+
+from .db import migrate_to_disk
+from .helpers import new_scrape_async_session
+from .models import RedditScrapeSource
+from .ratelimit import REDDIT_BUCKET
+from .subreddit_ranking import get_relevant_posts_from_subreddit_async
 from .legacy import (
     get_relevant_posts_from_subreddit_api,
     test_find_subreddits_via_reddit_posts_search_json,
     test_get_relevant_posts_from_subreddit_api_json,
 )
 from .core import (
-    calculate_and_insert_subreddit_score,
-    aggregate_and_filter_subreddits,
+    aggregate_and_filter_subreddits_async,
     score_and_rank_subreddits_async,
     score_and_rank_subreddits_stream,
     deduplicate_subreddits,
 )
 
+log = logging.getLogger(__name__)
+
+_ARCHIVE_DIR = Path(__file__).parent / "archive"
+
+# Subreddits with an archived posts file, from one directory scan at import
+try:
+    _ARCHIVE_INDEX = frozenset(p.stem for p in _ARCHIVE_DIR.glob("*.json"))
+except OSError:
+    _ARCHIVE_INDEX = frozenset()
+
+
+@functools.lru_cache(maxsize=256)
+def _load_archived_posts(sub_name: str) -> tuple:
+    """Parse (once per process) the archived posts for a subreddit, if an archive file exists."""
+    if sub_name not in _ARCHIVE_INDEX:
+        return ()
+    return tuple(test_get_relevant_posts_from_subreddit_api_json(str(_ARCHIVE_DIR / f"{sub_name}.json")))
+
 
 async def score_and_rank_subreddits(
     query: str,
@@ -44,45 +66,41 @@ async def score_and_rank_subreddits(
     Returns:
         Database connection with ranked subreddits
     """
-    from .helpers import process_json_responses
-    
     # Discover subreddits
-    discovery_result = aggregate_and_filter_subreddits(
+    discovery_result = await aggregate_and_filter_subreddits_async(
         query,
         reddit_min_comments=reddit_min_comments,
         google_target_count=google_target_count,
         reddit_scrape_source=reddit_scrape_source,
     )
     
-    # This will be called with db_conn from score_and_rank_subreddits_async
-    async def process_subreddit(subreddit: str, db_conn):
-        try:
+    # One pooled session shared by every subreddit fetch, so the TLS handshake
+    # to reddit.com is paid once per run instead of once per subreddit, always
+    # with the same impersonated browser fingerprint
+    async with new_scrape_async_session() as session:
+        # This will be called for each subreddit from score_and_rank_subreddits_async
+        async def process_subreddit(subreddit: str):
             # Fetch posts based on reddit_scrape_source
             if reddit_scrape_source == RedditScrapeSource.API:
-                posts = await get_relevant_posts_from_subreddit_api(subreddit=subreddit, query=query, timeout=timeout)
-            else:
-                posts = get_relevant_posts_from_subreddit(subreddit=subreddit, query=query, max_pages=1)
-            
-            # Call the core function with the fetched posts
-            await calculate_and_insert_subreddit_score(
-                db_conn=db_conn,
-                subreddit=subreddit,
-                posts=posts or [],
-                query=query,
+                return await get_relevant_posts_from_subreddit_api(
+                    subreddit=subreddit, query=query, timeout=timeout, session=session
+                )
+            return await get_relevant_posts_from_subreddit_async(
+                subreddit=subreddit, query=query, session=session
             )
-        except Exception as e:
-            print(f"Error processing {subreddit}: {e}")
-    
-    # Run score_and_rank_subreddits_async
-    db_conn = await score_and_rank_subreddits_async(
-        discovery_result,
-        process_subreddit,
-        query,
-        min_frequency,
-    )
-    
-    # Process JSON responses and migrate to posts table
-    await process_json_responses(db_conn, query)
+        
+        # Run score_and_rank_subreddits_async
+        db_conn = await score_and_rank_subreddits_async(
+            discovery_result,
+            process_subreddit,
+            query,
+            min_frequency,
+            rate_limiter=REDDIT_BUCKET,
+        )
+    
+    # Posts were written alongside the scores, so only the disk copy is left
+    if db_conn:
+        db_conn = await migrate_to_disk(db_conn)
     
     return db_conn
 
@@ -104,7 +122,7 @@ async def test_aggregate_subreddits_stream():
     # Step 1: Crawling Reddit
     yield {"stage": "crawling_reddit", "message": "Crawling Reddit search results..."}
     
-    archive_dir = Path(__file__).parent / "archive"
+    archive_dir = _ARCHIVE_DIR
     combined: List[str] = []
     
     # Read Reddit search results
@@ -113,29 +131,27 @@ async def test_aggregate_subreddits_stream():
         reddit_results = test_find_subreddits_via_reddit_posts_search_json(reddit_file, min_comments=5)
         combined.extend(reddit_results)
     except Exception as e:
-        pass
+        log.warning("Could not read archived Reddit search results: %s", e)
     
     # Step 2: Searching Google
     yield {"stage": "searching_google", "message": "Searching Google for subreddits..."}
     
     try:
         google_file = archive_dir / "testGoogleSearch.json"
-        with open(google_file, "r", encoding="utf-8") as f:
-            google_results = json.load(f)
-            combined.extend(google_results)
+        google_results = orjson.loads(google_file.read_bytes())
+        combined.extend(google_results)
     except Exception as e:
-        pass
+        log.warning("Could not read archived Google search results: %s", e)
     
     # Step 3: Asking Gemini
     yield {"stage": "asking_gemini", "message": "Asking Gemini for recommendations..."}
     
     try:
         gemini_file = archive_dir / "testGeminiSearch.json"
-        with open(gemini_file, "r", encoding="utf-8") as f:
-            gemini_results = json.load(f)
-            combined.extend(gemini_results)
+        gemini_results = orjson.loads(gemini_file.read_bytes())
+        combined.extend(gemini_results)
     except Exception as e:
-        pass
+        log.warning("Could not read archived Gemini results: %s", e)
     
     # Step 4: Aggregating results
     yield {"stage": "aggregating", "message": "Aggregating results from all sources..."}
@@ -144,12 +160,15 @@ async def test_aggregate_subreddits_stream():
     deduplicated = deduplicate_subreddits(combined)
     
     # Step 5: Report aggregated results
-    subreddit_list = ", ".join(deduplicated.subreddits[:10]) if len(deduplicated.subreddits) <= 10 else ", ".join(deduplicated.subreddits[:10]) + f" and {len(deduplicated.subreddits) - 10} more"
+    subs = deduplicated.subreddits
+    count = len(subs)
+    head = ", ".join(subs[:10])
+    subreddit_list = head if count <= 10 else f"{head} and {count - 10} more"
     yield {
         "stage": "aggregated",
-        "message": f"{len(deduplicated.subreddits)} aggregated results found: {subreddit_list}",
-        "count": len(deduplicated.subreddits),
-        "subreddits": deduplicated.subreddits
+        "message": f"{count} aggregated results found: {subreddit_list}",
+        "count": count,
+        "subreddits": subs
     }
     
     # Return the discovery result separately (not serialized to JSON)
@@ -174,7 +193,6 @@ async def test_score_and_rank_subreddits_streaming():
     - saving: Saving data to database
     - complete: Analysis finished
     """
-    archive_dir = Path(__file__).parent / "archive"
     discovery_result = None
     db_conn = None
     
@@ -191,13 +209,11 @@ async def test_score_and_rank_subreddits_streaming():
         """Load posts from archive file for a given subreddit."""
         # Extract subreddit name for file lookup (remove r/ prefix)
         sub_name = subreddit.replace('r/', '').replace('/', '')
+        if sub_name not in _ARCHIVE_INDEX:
+            return []
         
-        # Load posts from archive file
-        posts_file = archive_dir / f"{sub_name}.json"
-        
-        if posts_file.exists():
-            return test_get_relevant_posts_from_subreddit_api_json(str(posts_file))
-        return []
+        # Parse off the event loop so streaming events keep flowing
+        return list(await asyncio.to_thread(_load_archived_posts, sub_name))
     
     # Step 6-7: Call core streaming function and yield its events
     async for event in score_and_rank_subreddits_stream(
@@ -10,8 +10,11 @@ USER_AGENTS = {
     "chrome_mobile": "Mozilla/5.0 (Linux; Android 14; SM-G991B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Mobile Safari/537.36",
 }
 
+# User agent strings, materialized once for random.choice
+USER_AGENT_VALUES = tuple(USER_AGENTS.values())
+
 # Impersonate targets for curl_cffi (supported targets)
-IMPERSONATE_TARGETS = ["chrome131", "chrome120", "firefox120", "safari17_0"]
+IMPERSONATE_TARGETS = ("chrome131", "chrome120", "firefox120", "safari17_0")
 
 # URL Templates
 REDDIT_SEARCH_TEMPLATE = "https://old.reddit.com/search/?q={query}&sort=relevance&t=week"
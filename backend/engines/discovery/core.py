@@ -2,61 +2,157 @@
 
 import os
 import re
+import logging
+import math
+import functools
 import time
 import asyncio
-import random
-from typing import List
+import concurrent.futures
+from itertools import chain
+from typing import Iterable, List
 
 from dotenv import load_dotenv
 import instructor
 import httpx
+import orjson
 
+from ..http import get_http_client, get_sync_http_client, close_http_client
 from .constants import GOOGLE_SEARCH_URL
 from .models import SubredditDiscovery, SubredditPost, RedditScrapeSource
 from .prompts import get_subreddit_finder_prompt
 from .db import (
+    transaction,
+    flush,
     insert_subreddit,
+    insert_subreddits,
     init_subreddits_db,
-    select_subreddits_by_frequency,
-    select_all_subreddits_ordered,
-    update_relevance_score,
-    delete_subreddits_by_names,
-    update_json_response_null,
+    create_subreddits_indexes,
+    insert_posts,
+    migrate_to_disk,
 )
-from .helpers import add_jitter
-from .subreddit_discovery import scrape_reddit_search
-from .legacy import find_subreddits_via_reddit_posts_search
+from .ratelimit import TokenBucket
+from .subreddit_discovery import scrape_reddit_search, scrape_reddit_search_async
+from .legacy import find_subreddits_via_reddit_posts_search, find_subreddits_via_reddit_posts_search_async
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
 
-def deduplicate_subreddits(subreddits: List[str]) -> SubredditDiscovery:
+# Matches the r/name part of a reddit link
+_SUBREDDIT_LINK_RE = re.compile(r"(r/[a-zA-Z0-9_]+)")
+
+# System subs that show up in Google results but are never communities
+_GOOGLE_SUBREDDIT_DENYLIST = frozenset({"r/u", "r/reddit", "r/all"})
+
+# Longest a Google page retry sleeps, whatever Retry-After says; the paging loop
+# runs on discovery worker threads
+_GOOGLE_MAX_RETRY_DELAY = 8.0
+
+
+def normalize_name(x: str) -> str | None:
+    """Normalize a subreddit name to the lowercase 'r/name' form, or None if invalid."""
+    if not x or not isinstance(x, str):
+        return None
+    # Strip and lowercase once, then only slice or prefix
+    xl = x.strip().lower()
+    if not xl:
+        return None
+    if xl.startswith("/r/"):
+        return xl[1:]
+    if xl.startswith("r/"):
+        return xl
+    return "r/" + xl
+
+
+def deduplicate_subreddits(subreddits: Iterable[str]) -> SubredditDiscovery:
     """
     Remove duplicates and normalize subreddit names.
     
     Args:
-        subreddits: List of subreddit names (may contain duplicates and various formats)
+        subreddits: Subreddit names (may contain duplicates and various formats); consumed once
         
     Returns:
-        SubredditDiscovery with normalized, deduplicated subreddit names
-    """
-    def normalize_name(x: str) -> str | None:
-        if not x or not isinstance(x, str):
-            return None
-        if x.startswith("/r/"):
-            return x[1:].lower()
-        if x.startswith("r/"):
-            return x.lower()
-        return f"r/{x.strip().lower()}"
-
-    normalized_set: set[str] = set()
+        SubredditDiscovery with normalized, deduplicated subreddit names, in first-seen order
+    """
+    # dict.fromkeys dedups in C like a set but keeps the sources' order
+    normalized = dict.fromkeys(filter(None, map(normalize_name, subreddits)))
+    
+    return SubredditDiscovery(subreddits=list(normalized))
+
+
+def calculate_subreddit_score(
+    subreddit: str,
+    posts: List[SubredditPost],
+    query: str,
+    *,
+    q_lower: str | None = None,
+    cutoff: float | None = None,
+) -> tuple:
+    """
+    Calculate scores for a subreddit based on its posts.
     
-    for subreddit in subreddits:
-        normalized = normalize_name(subreddit)
-        if normalized:
-            normalized_set.add(normalized)
+    Args:
+        subreddit: Subreddit name (e.g., 'r/python')
+        posts: List of SubredditPost objects
+        query: The search query used for frequency calculation
+        q_lower: Precomputed lowercased query, so callers scoring many subreddits do it once
+        cutoff: Precomputed freshness cutoff (Unix seconds); defaults to 48 hours ago
+        
+    Returns:
+        Row tuple of (subreddit, engagement_raw, freshness, frequency)
+    """
+    frequency = 0
+    # Engagement is total votes + comments
+    engagement_raw = 0
+    freshness = 0
     
-    return SubredditDiscovery(subreddits=list(normalized_set))
+    if posts:
+        if q_lower is None:
+            q_lower = (query or "").lower()
+        if cutoff is None:
+            cutoff = time.time() - (48 * 3600)
+        
+        # Single fused pass per post; ups/num_comments are already ints on SubredditPost
+        for post in posts:
+            # Frequency: count occurrences of query in title and selftext (literal match),
+            # separately so long selftexts aren't copied into a concatenated string
+            if q_lower:
+                frequency += post.post_title.lower().count(q_lower) + post.self_text.lower().count(q_lower)
+
+            # Votes and comments for engagement
+            engagement_raw += (post.ups or 0) + (post.num_comments or 0)
+
+            # Freshness: posts in last 48 hours (0 means the time is unknown)
+            if post.created_utc >= cutoff:
+                freshness += 1
+
+    return (subreddit, engagement_raw, freshness, frequency)
+
+
+def build_post_rows(subreddit: str, posts: List[SubredditPost]) -> list:
+    """
+    Convert a subreddit's posts into rows for the posts table.
+    
+    Args:
+        subreddit: Subreddit name (e.g., 'r/python')
+        posts: List of SubredditPost objects
+        
+    Returns:
+        List of (subreddit, title, selftext, ups, num_comments, created_utc, url, pid) tuples
+    """
+    rows = []
+    for post in posts:
+        rows.append((
+            subreddit,
+            post.post_title,
+            post.self_text,
+            post.ups,
+            post.num_comments,
+            post.created_utc,
+            post.post_url,
+            post.post_id.replace('t3_', ''),  # Remove t3_ prefix if present
+        ))
+    return rows
 
 
 async def calculate_and_insert_subreddit_score(
@@ -66,7 +162,10 @@ async def calculate_and_insert_subreddit_score(
     query: str,
 ):
     """
-    Calculate scores for a subreddit based on posts and insert into DB.
+    Calculate scores for a subreddit based on posts and insert it and its posts into DB.
+    
+    Prefer `calculate_subreddit_score` + `insert_subreddits` when scoring many
+    subreddits, so all rows land in a single transaction.
     
     Args:
         db_conn: Database connection
@@ -75,65 +174,147 @@ async def calculate_and_insert_subreddit_score(
         query: The search query used for frequency calculation
     """
     try:
-        now = time.time()
-        frequency = 0
-        total_votes = 0
-        total_comments = 0
-        vote_counted_posts = 0
-        freshness = 0
-        
-        if posts:
-            json_response = str([p.model_dump() for p in posts])  # Store as string representation
-            q_lower = (query or "").lower()
-            pattern = re.compile(re.escape(q_lower))
-            cutoff = now - (48 * 3600)
-            
-            for post in posts:
-                title_lower = (post.post_title or "").lower()
-                selftext_lower = (post.self_text or "").lower()
-                text = title_lower + " " + selftext_lower
-
-                # Frequency: count occurrences of query in title+selftext
-                frequency += len(pattern.findall(text))
-
-                # Votes for engagement
-                try:
-                    ups = int(post.ups or 0)
-                    num_comments = int(post.num_comments or 0)
-                    total_votes += ups
-                    total_comments += num_comments
-                    vote_counted_posts += 1
-                except Exception:
-                    pass
-
-                # Freshness: posts in last 48 hours
-                created_datetime = post.created_datetime
-                try:
-                    if created_datetime:
-                        # Parse ISO format datetime
-                        from datetime import datetime
-                        created_time = datetime.fromisoformat(created_datetime.replace('Z', '+00:00')).timestamp()
-                        if created_time >= cutoff:
-                            freshness += 1
-                except Exception:
-                    pass
-        else:
-            json_response = None
-
-        # Engagement is total votes + comments
-        engagement_raw = total_votes + total_comments
+        await insert_subreddit(db_conn, *calculate_subreddit_score(subreddit, posts, query))
+        await insert_posts(db_conn, build_post_rows(subreddit, posts or []))
+        await flush(db_conn)
+    except Exception:
+        log.exception("Error processing %s", subreddit)
+
+
+def _score_batch(batch: List[str], fetch_results: list, query: str, posts_by_subreddit: dict) -> list:
+    """Turn the fetched posts (or exceptions) for a batch into subreddit rows, keeping the posts."""
+    rows = []
+    errors = []
+    # Shared by every subreddit in the batch
+    q_lower = (query or "").lower()
+    cutoff = time.time() - (48 * 3600)
+    for subreddit, posts in zip(batch, fetch_results):
+        if isinstance(posts, BaseException):
+            errors.append(f"{subreddit} ({type(posts).__name__}: {posts})")
+            continue
+        try:
+            rows.append(calculate_subreddit_score(subreddit, posts or [], query, q_lower=q_lower, cutoff=cutoff))
+            posts_by_subreddit[subreddit] = posts or []
+        except Exception as e:
+            errors.append(f"{subreddit} ({type(e).__name__}: {e})")
+    if errors:
+        log.warning("Error processing %d/%d subreddits: %s", len(errors), len(batch), "; ".join(errors))
+    return rows
+
+
+def _compute_relevance_scores(subreddit_rows: list, min_frequency: int) -> dict[str, float]:
+    """
+    Compute relevance scores for scored subreddit rows.
+    
+    Args:
+        subreddit_rows: Rows of (subreddit, engagement, freshness, frequency)
+        min_frequency: Minimum frequency score for a subreddit to be scored
         
-        # Insert into DB
-        await insert_subreddit(db_conn, subreddit, json_response, engagement_raw, freshness, frequency)
+    Returns:
+        Mapping of subreddit name to relevance_score for rows meeting min_frequency
+    """
+    # Single pass: keep rows meeting min_frequency and track the max of each metric
+    metrics = {}
+    max_freq = max_fresh = max_eng = 0
+    for sub, engagement, freshness, frequency in subreddit_rows:
+        if frequency < min_frequency:
+            continue
+        metrics[sub] = (frequency, freshness, engagement)
+        max_freq = max(max_freq, frequency)
+        max_fresh = max(max_fresh, freshness)
+        max_eng = max(max_eng, engagement)
+
+    # Normalize using max-scaling (a zero max normalizes everything to 0)
+    max_freq = float(max_freq) or None
+    max_fresh = float(max_fresh) or None
+    max_eng = float(max_eng) or None
+
+    return {
+        sub: (
+            0.4 * (frequency / max_freq if max_freq else 0.0)
+            + 0.3 * (freshness / max_fresh if max_fresh else 0.0)
+            + 0.3 * (engagement / max_eng if max_eng else 0.0)
+        ) * 100
+        for sub, (frequency, freshness, engagement) in metrics.items()
+    }
+
 
-    except Exception as e:
-        print(f"Error processing {subreddit}: {e}")
+def _rank_subreddit_names(subreddit_rows: list, relevance_scores: dict[str, float]) -> List[str]:
+    """
+    Order subreddit names by relevance_score descending.
+    
+    Unscored subreddits (below min_frequency) sort last, matching SQLite's
+    placement of NULLs in `ORDER BY relevance_score DESC`.
+    """
+    def sort_key(row):
+        score = relevance_scores.get(row[0])
+        return (score is None, -(score or 0.0))
+
+    return [row[0] for row in sorted(subreddit_rows, key=sort_key)]
+
+
+async def _write_ranked_subreddits(
+    db_conn,
+    subreddit_rows: list,
+    relevance_scores: dict[str, float],
+    posts_by_subreddit: dict,
+):
+    """
+    Persist the top 20 subreddits and the posts of the top 5 in a single transaction.
+    
+    When nothing met min_frequency, every subreddit and all of its posts are kept.
+    """
+    if relevance_scores:
+        # Sort by relevance_score desc, in Python since the scores are already known
+        ranked = _rank_subreddit_names(subreddit_rows, relevance_scores)
+        kept = set(ranked[:20])
+        subreddit_rows = [row for row in subreddit_rows if row[0] in kept]
+        post_subreddits = ranked[:5]
+    else:
+        post_subreddits = [row[0] for row in subreddit_rows]
+
+    async with transaction(db_conn):
+        await insert_subreddits(
+            db_conn, [(*row, relevance_scores.get(row[0])) for row in subreddit_rows]
+        )
+        await insert_posts(db_conn, [
+            post_row
+            for subreddit in post_subreddits
+            for post_row in build_post_rows(subreddit, posts_by_subreddit.get(subreddit, []))
+        ])
+
+    # Index after the bulk load so the ordered reads on the final DB avoid a sort
+    await create_subreddits_indexes(db_conn)
+
+
+@functools.lru_cache(maxsize=512)
+def _find_subreddits_via_gemini_cached(model: str, topic: str) -> tuple[str, ...]:
+    """
+    Ask Gemini for subreddits for a normalized topic, memoized per (model, topic).
+    
+    Errors propagate so failed calls are not cached.
+    """
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    prompt = get_subreddit_finder_prompt(topic)
+
+    mode = instructor.Mode.OPENROUTER_STRUCTURED_OUTPUTS
+    client = instructor.from_provider(model, api_key=api_key, mode=mode)
+    
+    parsed_obj = client.create(
+        response_model=SubredditDiscovery, 
+        messages=[{"role": "user", "content": prompt}], 
+        max_retries=2
+    )
+    return tuple(parsed_obj.subreddits)
 
 
 def find_subreddits_via_gemini(topic: str) -> SubredditDiscovery:
     """
     Find subreddits for a topic using Gemini via OpenRouter.
     
+    Results are cached in-process per (model, normalized topic), so repeat
+    queries skip the LLM round-trip.
+    
     Args:
         topic: The topic to find subreddits for
         
@@ -143,26 +324,47 @@ def find_subreddits_via_gemini(topic: str) -> SubredditDiscovery:
     if not topic or not topic.strip():
         return SubredditDiscovery()
 
-    api_key = os.getenv("OPENROUTER_API_KEY")
     model = os.getenv("SUBREDDIT_FINDER_MODEL", "openrouter/google/gemini-2.5-flash")
 
-    prompt = get_subreddit_finder_prompt(topic)
-
     try:
-        mode = instructor.Mode.OPENROUTER_STRUCTURED_OUTPUTS
-        client = instructor.from_provider(model, api_key=api_key, mode=mode)
-        
-        parsed_obj = client.create(
-            response_model=SubredditDiscovery, 
-            messages=[{"role": "user", "content": prompt}], 
-            max_retries=2
-        )
-        return parsed_obj
+        subreddits = _find_subreddits_via_gemini_cached(model, topic.strip().lower())
+        return SubredditDiscovery(subreddits=list(subreddits))
     except Exception as exc:
-        print(f"Error fetching subreddits: {exc}")
+        log.warning("Error fetching subreddits: %s", exc)
         return SubredditDiscovery()
 
 
+def _google_search_params(query: str) -> dict:
+    """Build the Google Custom Search params shared by every results page."""
+    return {
+        "key": os.getenv("GOOGLE_SEARCH_API_KEY"),
+        "cx": os.getenv("GOOGLE_SEARCH_CX"),
+        "q": f'{query} site:reddit.com/r/',
+        "num": 10,
+        "sort": "date",
+        "dateRestrict": "m6"
+    }
+
+
+def _add_subreddits_from_google_items(items: list, discovered_subs: set) -> None:
+    """Extract subreddit names from Google result items into `discovered_subs`."""
+    for item in items:
+        link = item.get("link", "")
+        
+        # SKIP translations (tl=) and user profiles (u/)
+        if "?tl=" in link or "/u/" in link:
+            continue
+        
+        # Extract r/name
+        match = _SUBREDDIT_LINK_RE.search(link)
+        if match:
+            sub = match.group(1).lower()
+            
+            # Skip system subs
+            if sub not in _GOOGLE_SUBREDDIT_DENYLIST:
+                discovered_subs.add(sub)
+
+
 def find_subreddits_via_google(query: str, target_count: int = 20) -> List[str]:
     """
     Find subreddits for a query using Google Custom Search API.
@@ -174,60 +376,121 @@ def find_subreddits_via_google(query: str, target_count: int = 20) -> List[str]:
     Returns:
         List of subreddit names
     """
-    api_key = os.getenv("GOOGLE_SEARCH_API_KEY")
-    cx_id = os.getenv("GOOGLE_SEARCH_CX")
-    
-    search_query = f'{query} site:reddit.com/r/'
+    base_params = _google_search_params(query)
     
     discovered_subs = set()
     
     # Loop to get up to 40-50 results (10 per page)
     for start in range(1, 41, 10):
-        params = {
-            "key": api_key,
-            "cx": cx_id,
-            "q": search_query,
-            "num": 10,
-            "start": start,
-            "sort": "date",
-            "dateRestrict": "m6"
-        }
+        params = {**base_params, "start": start}
 
         try:
-            response = httpx.get(GOOGLE_SEARCH_URL, params=params)
-            if response.status_code != 200:
+            response = _get_google_page(params)
+            if response is None:
                 break
             
-            items = response.json().get("items", [])
-            for item in items:
-                link = item.get("link", "")
-                
-                # SKIP translations (tl=) and user profiles (u/)
-                if "?tl=" in link or "/u/" in link:
-                    continue
-                
-                # Extract r/name
-                match = re.search(r"(r/[a-zA-Z0-9_]+)", link)
-                if match:
-                    sub = match.group(1).lower()
-                    
-                    # Skip system subs
-                    if sub not in ["r/u", "r/reddit", "r/all"]:
-                        discovered_subs.add(sub)
+            _add_subreddits_from_google_items(orjson.loads(response.content).get("items", []), discovered_subs)
             
             # Stop if we have enough
             if len(discovered_subs) >= target_count:
                 break
-                
-            time.sleep(0.5)  # Anti-throttle
             
         except Exception as e:
-            print(f"Discovery Error: {e}")
+            log.warning("Discovery Error: %s", e)
             break
             
     return list(discovered_subs)
 
 
+def _google_retry_delay(retry_after: str | None, attempt: int) -> float:
+    """Seconds to sleep before retry `attempt`: a numeric Retry-After, else 2**attempt, capped."""
+    try:
+        delay = float(retry_after)
+    except (TypeError, ValueError):
+        # Missing, or an HTTP-date
+        delay = 2 ** attempt
+    if not math.isfinite(delay) or delay < 0:
+        delay = 2 ** attempt
+    return min(delay, _GOOGLE_MAX_RETRY_DELAY)
+
+
+def _get_google_page(params: dict, max_rate_limit_retries: int = 3) -> httpx.Response | None:
+    """
+    Fetch one Google Custom Search page, backing off only when rate limited.
+    
+    Retries 429s with exponential backoff (honouring a numeric Retry-After) and 5xx
+    once after a short pause; no wait exceeds _GOOGLE_MAX_RETRY_DELAY seconds.
+    
+    Returns:
+        The 200 response, or None if the page could not be fetched
+    """
+    rate_limit_retries = 0
+    server_error_retries = 0
+
+    while True:
+        response = get_sync_http_client().get(GOOGLE_SEARCH_URL, params=params)
+        status = response.status_code
+
+        if status == 200:
+            return response
+
+        if status == 429 and rate_limit_retries < max_rate_limit_retries:
+            time.sleep(_google_retry_delay(response.headers.get("Retry-After"), rate_limit_retries))
+            rate_limit_retries += 1
+            continue
+
+        if status >= 500 and server_error_retries < 1:
+            time.sleep(_google_retry_delay(response.headers.get("Retry-After"), server_error_retries))
+            server_error_retries += 1
+            continue
+
+        # Auth/quota errors and exhausted retries: stop paging
+        return None
+
+
+async def find_subreddits_via_google_async(query: str, target_count: int = 20) -> List[str]:
+    """
+    Find subreddits for a query using Google Custom Search API, fetching all pages concurrently.
+    
+    Args:
+        query: The search query
+        target_count: Target number of subreddits to find
+        
+    Returns:
+        List of subreddit names
+    """
+    base_params = _google_search_params(query)
+
+    # Result pages are independent, so request all of them at once on the shared client
+    client = get_http_client()
+    responses = await asyncio.gather(
+        *[client.get(GOOGLE_SEARCH_URL, params={**base_params, "start": start}) for start in range(1, 41, 10)],
+        return_exceptions=True,
+    )
+
+    discovered_subs = set()
+
+    # Merge pages in order, stopping at the first failed page as the sync variant does
+    for response in responses:
+        if isinstance(response, BaseException):
+            log.warning("Discovery Error: %s", response)
+            break
+        if response.status_code != 200:
+            break
+
+        try:
+            _add_subreddits_from_google_items(orjson.loads(response.content).get("items", []), discovered_subs)
+        except Exception as e:
+            log.warning("Discovery Error: %s", e)
+            break
+
+        # Stop if we have enough
+        if len(discovered_subs) >= target_count:
+            break
+
+    return list(discovered_subs)
+
+
 def aggregate_and_filter_subreddits(
     query: str,
     reddit_min_comments: int = 5,
@@ -246,38 +509,119 @@ def aggregate_and_filter_subreddits(
     Returns:
         DiscoveredSubreddits with list of normalized subreddit names
     """
-    combined: List[str] = []
+    found: List[Iterable[str]] = []
 
     # Discover via reddit posts (using specified source)
-    try:
-        if reddit_scrape_source == RedditScrapeSource.HTML:
-            reddit_found = scrape_reddit_search(query)
-        else:
-            reddit_found = find_subreddits_via_reddit_posts_search(query, min_comments=reddit_min_comments)
+    if reddit_scrape_source == RedditScrapeSource.HTML:
+        reddit_source = (scrape_reddit_search, (query,), {})
+    else:
+        reddit_source = (find_subreddits_via_reddit_posts_search, (query,), {"min_comments": reddit_min_comments})
+
+    sources = {
+        "reddit": reddit_source,
+        # Discover via Gemini (instructor)
+        "gemini": (find_subreddits_via_gemini, (query,), {}),
+        # Discover via Google
+        "google": (find_subreddits_via_google, (query,), {"target_count": google_target_count}),
+    }
+
+    # Run the three sources in parallel threads and merge as each finishes
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(sources)) as executor:
+        futures = {
+            executor.submit(func, *args, **kwargs): name
+            for name, (func, args, kwargs) in sources.items()
+        }
+        for future in concurrent.futures.as_completed(futures):
+            name = futures[future]
+            exc = future.exception()
+            if exc is not None:
+                log.warning("%s discovery failed: %s", name, exc)
+                continue
+
+            result = future.result()
+            if name == "gemini":
+                result = getattr(result, "subreddits", None)
+            found.append(result or ())
+
+    # Normalize and deduplicate straight off the per-source results
+    return deduplicate_subreddits(chain.from_iterable(found))
+
+
+async def aggregate_and_filter_subreddits_async(
+    query: str,
+    reddit_min_comments: int = 5,
+    google_target_count: int = 20,
+    reddit_scrape_source: RedditScrapeSource = RedditScrapeSource.HTML,
+) -> SubredditDiscovery:
+    """
+    Discover subreddits from Reddit posts, Gemini, and Google concurrently, and deduplicate.
+
+    Same as `aggregate_and_filter_subreddits`, but the three sources run at the same time
+    so the total latency is that of the slowest source rather than their sum.
+
+    Args:
+        query: The search query
+        reddit_min_comments: Minimum comments for Reddit results
+        google_target_count: Target count for Google results
+        reddit_scrape_source: Source for Reddit scraping ("html" or "api")
         
-        combined.extend(reddit_found)
-    except Exception as exc:
-        print(f"reddit discovery failed: {exc}")
+    Returns:
+        DiscoveredSubreddits with list of normalized subreddit names
+    """
+    if reddit_scrape_source == RedditScrapeSource.HTML:
+        reddit_task = scrape_reddit_search_async(query)
+    else:
+        reddit_task = find_subreddits_via_reddit_posts_search_async(query, min_comments=reddit_min_comments)
 
-    # Discover via Gemini (instructor)
-    try:
-        gemini_obj = find_subreddits_via_gemini(query)
-        gemini_list = []
-        if hasattr(gemini_obj, "subreddits"):
-            gemini_list = getattr(gemini_obj, "subreddits") or []
-        combined.extend(gemini_list)
-    except Exception as exc:
-        print(f"gemini discovery failed: {exc}")
+    reddit_found, gemini_obj, google_list = await asyncio.gather(
+        reddit_task,
+        asyncio.to_thread(find_subreddits_via_gemini, query),
+        find_subreddits_via_google_async(query, target_count=google_target_count),
+        return_exceptions=True,
+    )
 
-    # Discover via Google
-    try:
-        google_list = find_subreddits_via_google(query, target_count=google_target_count) or []
-        combined.extend(google_list)
-    except Exception as exc:
-        print(f"google discovery failed: {exc}")
+    found: List[Iterable[str]] = []
+
+    if isinstance(reddit_found, BaseException):
+        log.warning("reddit discovery failed: %s", reddit_found)
+    else:
+        found.append(reddit_found or ())
+
+    if isinstance(gemini_obj, BaseException):
+        log.warning("gemini discovery failed: %s", gemini_obj)
+    else:
+        found.append(getattr(gemini_obj, "subreddits", None) or ())
+
+    if isinstance(google_list, BaseException):
+        log.warning("google discovery failed: %s", google_list)
+    else:
+        found.append(google_list or ())
+
+    # Normalize and deduplicate straight off the per-source results
+    return deduplicate_subreddits(chain.from_iterable(found))
+
+
+def _start_fetches(
+    subreddits: List[str],
+    process_subreddit,
+    max_concurrency: int,
+    rate_limiter: TokenBucket | None,
+) -> list:
+    """
+    Start one fetch task per subreddit, in order.
+    
+    At most `max_concurrency` fetches run at once, and each takes a token from
+    `rate_limiter` (when given) before it starts.
+    """
+    sem = asyncio.Semaphore(max_concurrency)
 
-    # Use core function to deduplicate and normalize
-    return deduplicate_subreddits(combined)
+    async def fetch(subreddit: str):
+        async with sem:
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+            return await process_subreddit(subreddit)
+
+    return [asyncio.ensure_future(fetch(subreddit)) for subreddit in subreddits]
 
 
 async def score_and_rank_subreddits_async(
@@ -285,18 +629,22 @@ async def score_and_rank_subreddits_async(
     process_subreddit,
     query: str,
     min_frequency: int = 3,
+    max_concurrency: int = 4,
+    rate_limiter: TokenBucket | None = None,
 ):
     """
     Score and rank discovered subreddits asynchronously.
     
-    Uses batched concurrent calls (2-4 random simultaneous calls) with jitter between batches
-    to avoid detection and rate limiting.
+    Keeps up to `max_concurrency` fetches in flight, paced by `rate_limiter` when given.
+    Scores are written to the DB in a single transaction.
 
     Args:
         discovery_result: SubredditDiscovery object with discovered subreddits
-        process_subreddit: Async callable that processes a single subreddit
+        process_subreddit: Async callable that fetches posts for a single subreddit
         query: The search query
         min_frequency: Minimum frequency score to include
+        max_concurrency: Maximum number of subreddits fetched at the same time
+        rate_limiter: Token bucket each fetch waits on before it starts
         
     Returns:
         Database connection with ranked subreddits
@@ -306,86 +654,22 @@ async def score_and_rank_subreddits_async(
     if not subreddits:
         return []
 
-    # Initialize in-memory DB
-    db_conn = await init_subreddits_db()
+    fetch_results = await asyncio.gather(
+        *_start_fetches(subreddits, process_subreddit, max_concurrency, rate_limiter),
+        return_exceptions=True,
+    )
+    posts_by_subreddit: dict = {}
+    subreddit_rows = _score_batch(subreddits, fetch_results, query, posts_by_subreddit)
 
-    # Process subreddits in batches with random concurrency (2-4 per batch)
-    i = 0
-    batch_num = 1
-    while i < len(subreddits):
-        # Random batch size for each iteration
-        batch_size = random.randint(2, 4)
-        batch = subreddits[i:i + batch_size]
-        
-        if not batch:
-            break
-        
-        # Create tasks for this batch
-        batch_tasks = [process_subreddit(subreddit, db_conn) for subreddit in batch]
-        
-        # Run batch concurrently
-        await asyncio.gather(*batch_tasks)
-        
-        i += len(batch)
-        batch_num += 1
-        
-        # Add jitter between batches (if not the last batch)
-        if i < len(subreddits):
-            await add_jitter(min_delay=1.5, max_delay=3.5)
-
-    # Fetch all scores from DB
-    rows = await select_subreddits_by_frequency(db_conn, min_frequency)
+    # Calculate relevance_score in Python from the scored rows
+    relevance_scores = _compute_relevance_scores(subreddit_rows, min_frequency)
 
-    if not rows:
-        await db_conn.close()
+    if not relevance_scores:
         return []
 
-    # Extract scores for normalization
-    freq_map = {row[0]: row[3] for row in rows}
-    fresh_map = {row[0]: row[2] for row in rows}
-    eng_map = {row[0]: row[1] for row in rows}
-
-    # Normalize using max-scaling
-    def normalize_map(m: dict) -> dict:
-        if not m:
-            return {}
-        max_val = max(m.values())
-        if not max_val:
-            return {k: 0.0 for k in m}
-        return {k: float(v) / float(max_val) for k, v in m.items()}
-
-    norm_freq = normalize_map(freq_map)
-    norm_fresh = normalize_map(fresh_map)
-    norm_eng = normalize_map(eng_map)
-
-    # Calculate relevance_score and update DB
-    for sub in freq_map.keys():
-        score = (
-            0.4 * norm_freq.get(sub, 0.0)
-            + 0.3 * norm_fresh.get(sub, 0.0)
-            + 0.3 * norm_eng.get(sub, 0.0)
-        )
-        relevance_score = score * 100
-        await update_relevance_score(db_conn, sub, relevance_score)
-
-    # Fetch all with relevance_score, sort by relevance_score desc
-    all_rows = await select_all_subreddits_ordered(db_conn)
-
-    # Keep top 20
-    top_20 = all_rows[:20]
-
-    # Delete subreddits not in top 20
-    if len(all_rows) > 20:
-        bottom_subs = [row[0] for row in all_rows[20:]]
-        await delete_subreddits_by_names(db_conn, bottom_subs)
-
-    # For subreddits not in top 5, remove json_response
-    if len(top_20) > 5:
-        for i in range(5, len(top_20)):
-            await update_json_response_null(db_conn, top_20[i][0])
-
-    # Fetch final top 20
-    final_rows = await select_all_subreddits_ordered(db_conn)
+    # Initialize in-memory DB and write the ranked subreddits and top posts
+    db_conn = await init_subreddits_db()
+    await _write_ranked_subreddits(db_conn, subreddit_rows, relevance_scores, posts_by_subreddit)
 
     return db_conn
 
@@ -395,6 +679,8 @@ async def score_and_rank_subreddits_stream(
     process_subreddit_func,
     query: str,
     min_frequency: int = 3,
+    max_concurrency: int = 4,
+    rate_limiter: TokenBucket | None = None,
 ):
     """
     Score and rank discovered subreddits with streaming progress events.
@@ -408,12 +694,12 @@ async def score_and_rank_subreddits_stream(
         process_subreddit_func: Async callable that processes a single subreddit and returns posts
         query: The search query
         min_frequency: Minimum frequency score to include
+        max_concurrency: Maximum number of subreddits fetched at the same time
+        rate_limiter: Token bucket each fetch waits on before it starts
         
     Yields:
         Dict events with stage and message information
     """
-    from .helpers import process_json_responses
-    
     # Step 1: Ranking subreddits
     yield {"stage": "ranking", "message": "Ranking subreddits based on relevance..."}
     
@@ -422,105 +708,42 @@ async def score_and_rank_subreddits_stream(
     
     subreddits = discovery_result.subreddits
     
-    # Process subreddits in batches with events
-    i = 0
-    batch_num = 1
-    while i < len(subreddits):
-        # Random batch size for each iteration
-        batch_size = random.randint(2, 4)
-        batch = subreddits[i:i + batch_size]
-        
-        if not batch:
-            break
-        
-        # Yield batch processing event
-        batch_list = ", ".join(batch)
-        yield {
-            "stage": "processing_batch",
-            "message": f"Processing batch {batch_num}: [{batch_list}]",
-            "batch_number": batch_num,
-            "subreddits": batch
-        }
-        
-        # Process each subreddit in the batch
-        batch_tasks = []
-        for subreddit in batch:
-            try:
-                # Get posts from the provided function
-                posts = await process_subreddit_func(subreddit)
-                
-                # Call the core function with the fetched posts
-                batch_tasks.append(calculate_and_insert_subreddit_score(
-                    db_conn=db_conn,
-                    subreddit=subreddit,
-                    posts=posts,
-                    query=query,
-                ))
-            except Exception as e:
-                print(f"Error processing {subreddit}: {e}")
-        
-        # Run batch concurrently
-        await asyncio.gather(*batch_tasks)
-        
-        i += len(batch)
-        batch_num += 1
-        
-        # Add jitter between batches (if not the last batch)
-        if i < len(subreddits):
-            await add_jitter(min_delay=1.5, max_delay=3.5)
-    
-    # Continue with scoring and ranking
-    rows = await select_subreddits_by_frequency(db_conn, min_frequency)
-    
-    if rows:
-        # Extract scores for normalization
-        freq_map = {row[0]: row[3] for row in rows}
-        fresh_map = {row[0]: row[2] for row in rows}
-        eng_map = {row[0]: row[1] for row in rows}
-
-        # Normalize using max-scaling
-        def normalize_map(m: dict) -> dict:
-            if not m:
-                return {}
-            max_val = max(m.values())
-            if not max_val:
-                return {k: 0.0 for k in m}
-            return {k: float(v) / float(max_val) for k, v in m.items()}
-
-        norm_freq = normalize_map(freq_map)
-        norm_fresh = normalize_map(fresh_map)
-        norm_eng = normalize_map(eng_map)
-
-        # Calculate relevance_score and update DB
-        for sub in freq_map.keys():
-            score = (
-                0.4 * norm_freq.get(sub, 0.0)
-                + 0.3 * norm_fresh.get(sub, 0.0)
-                + 0.3 * norm_eng.get(sub, 0.0)
+    # All fetches start up front, paced by the semaphore and rate limiter rather than
+    # by sleeping between batches; batches only group the progress events
+    subreddit_rows = []
+    posts_by_subreddit: dict = {}
+    tasks = _start_fetches(subreddits, process_subreddit_func, max_concurrency, rate_limiter)
+    try:
+        for batch_num, start in enumerate(range(0, len(subreddits), max_concurrency), 1):
+            batch = subreddits[start:start + max_concurrency]
+            
+            # Yield batch processing event
+            batch_list = ", ".join(batch)
+            yield {
+                "stage": "processing_batch",
+                "message": f"Processing batch {batch_num}: [{batch_list}]",
+                "batch_number": batch_num,
+                "subreddits": batch
+            }
+            
+            fetch_results = await asyncio.gather(
+                *tasks[start:start + max_concurrency],
+                return_exceptions=True,
             )
-            relevance_score = score * 100
-            await update_relevance_score(db_conn, sub, relevance_score)
-
-        # Fetch all with relevance_score, sort by relevance_score desc
-        all_rows = await select_all_subreddits_ordered(db_conn)
-
-        # Keep top 20
-        top_20 = all_rows[:20]
-
-        # Delete subreddits not in top 20
-        if len(all_rows) > 20:
-            bottom_subs = [row[0] for row in all_rows[20:]]
-            await delete_subreddits_by_names(db_conn, bottom_subs)
-
-        # For subreddits not in top 5, remove json_response
-        if len(top_20) > 5:
-            for i in range(5, len(top_20)):
-                await update_json_response_null(db_conn, top_20[i][0])
+            subreddit_rows.extend(_score_batch(batch, fetch_results, query, posts_by_subreddit))
+    finally:
+        # Don't leave fetches running if the consumer stops early
+        for task in tasks:
+            task.cancel()
+    
+    # Calculate relevance_score in Python and write the ranked subreddits and top posts
+    relevance_scores = _compute_relevance_scores(subreddit_rows, min_frequency)
+    await _write_ranked_subreddits(db_conn, subreddit_rows, relevance_scores, posts_by_subreddit)
     
     # Step 2: Saving data
     yield {"stage": "saving", "message": "Processing and saving data to database..."}
     
-    db_conn = await process_json_responses(db_conn, query)
+    db_conn = await migrate_to_disk(db_conn)
     
     # Yield internal event with db_conn for next phase
     yield {
@@ -530,11 +753,18 @@ async def score_and_rank_subreddits_stream(
 
 
 __all__ = [
+    "normalize_name",
     "deduplicate_subreddits",
+    "calculate_subreddit_score",
+    "build_post_rows",
     "calculate_and_insert_subreddit_score",
     "find_subreddits_via_gemini",
     "find_subreddits_via_google",
+    "find_subreddits_via_google_async",
+    "get_http_client",
+    "close_http_client",
     "aggregate_and_filter_subreddits",
+    "aggregate_and_filter_subreddits_async",
     "score_and_rank_subreddits_async",
     "score_and_rank_subreddits_stream",
 ]
@@ -1,35 +1,96 @@
-"""Database operations for the discovery module."""
+"""Database operations for the discovery module.
+
+Mutating helpers do not commit; wrap them in `transaction(db)` (or call
+`flush(db)`) so a whole batch of writes shares one commit.
+"""
 
 import aiosqlite
 
+from ..sqlite import insert_many, transaction
+
+
+async def flush(db):
+    """Commit any writes issued outside of a `transaction` block."""
+    await db.commit()
+
 
 async def get_db():
     """Create and return an in-memory SQLite database connection."""
-    return await aiosqlite.connect(":memory:")
+    db = await aiosqlite.connect(":memory:")
+    # Ephemeral load-then-migrate DB: skip fsync and journal I/O on the write path
+    await db.executescript("""
+        PRAGMA journal_mode=MEMORY;
+        PRAGMA synchronous=OFF;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-65536;
+    """)
+    # No locking_mode=EXCLUSIVE: migrate_to_disk attaches subreddits.db to this connection,
+    # and attached files inherit the mode, locking out every other reader of the file
+    return db
 
 
 async def create_subreddits_table(db):
-    """Create the subreddits table."""
+    """Create the subreddits table.
+
+    WITHOUT ROWID stores rows in the primary-key B-tree itself instead of a rowid
+    table plus a separate unique index on subreddit_name.
+    """
     await db.execute("""
         CREATE TABLE subreddits (
             subreddit_name TEXT PRIMARY KEY,
-            json_response TEXT,
             engagement_score REAL,
             freshness_score REAL,
             frequency_score REAL,
             relevance_score REAL
-        )
+        ) WITHOUT ROWID
     """)
     await db.commit()
 
 
-async def insert_subreddit(db, subreddit_name, json_response, engagement_score, freshness_score, frequency_score):
-    """Insert a subreddit into the database."""
+async def create_subreddits_indexes(db):
+    """Create the frequency and relevance indexes on the subreddits table.
+
+    Call once the bulk insert is done so the inserts skip index maintenance.
+    """
+    await db.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_subreddits_frequency ON subreddits(frequency_score);
+        CREATE INDEX IF NOT EXISTS idx_subreddits_relevance ON subreddits(relevance_score DESC);
+    """)
+
+
+async def upsert_subreddit_score(db, subreddit_name, engagement_score, freshness_score, frequency_score,
+                                 relevance_score=None):
+    """Insert a subreddit's scores, or overwrite them if the subreddit is already stored."""
     await db.execute("""
-        INSERT INTO subreddits (subreddit_name, json_response, engagement_score, freshness_score, frequency_score)
+        INSERT INTO subreddits (subreddit_name, engagement_score, freshness_score, frequency_score, relevance_score)
         VALUES (?, ?, ?, ?, ?)
-    """, (subreddit_name, json_response, engagement_score, freshness_score, frequency_score))
-    await db.commit()
+        ON CONFLICT(subreddit_name) DO UPDATE SET
+            engagement_score = excluded.engagement_score,
+            freshness_score = excluded.freshness_score,
+            frequency_score = excluded.frequency_score,
+            relevance_score = excluded.relevance_score
+    """, (subreddit_name, engagement_score, freshness_score, frequency_score, relevance_score))
+
+
+async def insert_subreddit(db, subreddit_name, engagement_score, freshness_score, frequency_score):
+    """Insert a subreddit into the database, with no relevance score yet."""
+    await upsert_subreddit_score(db, subreddit_name, engagement_score, freshness_score, frequency_score)
+
+
+async def insert_subreddits(db, rows):
+    """Insert many subreddit rows with chunked multi-row INSERTs.
+
+    Args:
+        db: Database connection
+        rows: Iterable of (subreddit_name, engagement_score, freshness_score, frequency_score,
+            relevance_score)
+    """
+    await insert_many(
+        db,
+        "INSERT INTO subreddits (subreddit_name, engagement_score, freshness_score, frequency_score, relevance_score)",
+        5,
+        rows,
+    )
 
 
 async def select_subreddits_by_frequency(db, min_frequency):
@@ -45,7 +106,7 @@ async def select_subreddits_by_frequency(db, min_frequency):
 async def select_all_subreddits_ordered(db):
     """Select all subreddits ordered by relevance_score descending."""
     cursor = await db.execute(
-        "SELECT subreddit_name, json_response, engagement_score, freshness_score, "
+        "SELECT subreddit_name, engagement_score, freshness_score, "
         "frequency_score, relevance_score FROM subreddits ORDER BY relevance_score DESC"
     )
     return await cursor.fetchall()
@@ -57,28 +118,38 @@ async def update_relevance_score(db, subreddit_name, relevance_score):
         "UPDATE subreddits SET relevance_score = ? WHERE subreddit_name = ?",
         (relevance_score, subreddit_name)
     )
-    await db.commit()
+
+
+async def update_relevance_scores(db, scores):
+    """Update relevance_score for many subreddits with a single executemany.
+
+    Args:
+        db: Database connection
+        scores: Iterable of (relevance_score, subreddit_name) pairs
+    """
+    await db.executemany(
+        "UPDATE subreddits SET relevance_score = ? WHERE subreddit_name = ?",
+        scores
+    )
 
 
 async def delete_subreddits_by_names(db, subreddit_names):
-    """Delete subreddits by their names."""
+    """Delete subreddits by their names.
+
+    The names go through a temp table rather than an IN list of placeholders, so any
+    number of names can be passed and the delete probes the primary key.
+    """
     if not subreddit_names:
         return
-    placeholders = ','.join('?' * len(subreddit_names))
-    await db.execute(
-        f"DELETE FROM subreddits WHERE subreddit_name IN ({placeholders})",
-        subreddit_names
+    await db.execute("CREATE TEMP TABLE IF NOT EXISTS _deleted_subreddits (name TEXT PRIMARY KEY)")
+    await db.executemany(
+        "INSERT OR IGNORE INTO _deleted_subreddits VALUES (?)",
+        [(name,) for name in subreddit_names]
     )
-    await db.commit()
-
-
-async def update_json_response_null(db, subreddit_name):
-    """Set json_response to NULL for a subreddit."""
     await db.execute(
-        "UPDATE subreddits SET json_response = NULL WHERE subreddit_name = ?",
-        (subreddit_name,)
+        "DELETE FROM subreddits WHERE subreddit_name IN (SELECT name FROM _deleted_subreddits)"
     )
-    await db.commit()
+    await db.execute("DROP TABLE _deleted_subreddits")
 
 
 async def close_db(db):
@@ -87,22 +158,72 @@ async def close_db(db):
 
 
 async def init_subreddits_db():
-    """Initialize in-memory SQLite database for subreddits."""
+    """Initialize in-memory SQLite database for subreddits and their posts."""
     db_conn = await get_db()
     await create_subreddits_table(db_conn)
+    await create_posts_table(db_conn)
     return db_conn
 
 
+# Tables migrate_to_disk leaves in the file: the inference triplet cache is keyed by
+# post text, not by run, so its analyses stay valid for the next dataset
+PRESERVED_TABLES = ("triplet_cache",)
+
+
 async def migrate_to_disk(db, db_path="subreddits.db"):
-    """Migrate the in-memory database to a file-based database."""
+    """Migrate the in-memory database to a file-based database.
+
+    The file is attached to the in-memory connection and each table is copied with
+    a single INSERT ... SELECT in one transaction, rather than page by page through
+    the backup API. Tables already in the file are replaced, except PRESERVED_TABLES.
+    """
+    try:
+        await db.execute("ATTACH DATABASE ? AS disk", (db_path,))
+        try:
+            # Attached files inherit the connection's locking mode; keep the file shareable
+            # with the pooled readers and any still-open connection from a previous run
+            await db.execute("PRAGMA disk.locking_mode=NORMAL")
+            await db.execute("PRAGMA disk.synchronous=OFF")
+
+            placeholders = ",".join("?" * len(PRESERVED_TABLES))
+            cursor = await db.execute(
+                "SELECT name FROM disk.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+                f"AND name NOT IN ({placeholders})",
+                PRESERVED_TABLES,
+            )
+            existing_tables = await cursor.fetchall()
+            # Tables first, so indexes are built once over the copied rows
+            cursor = await db.execute(
+                "SELECT type, name, sql FROM main.sqlite_master WHERE sql IS NOT NULL ORDER BY type = 'index'"
+            )
+            schema = await cursor.fetchall()
+
+            async with transaction(db):
+                for (name,) in existing_tables:
+                    await db.execute(f'DROP TABLE disk."{name}"')
+                for type_, name, sql in schema:
+                    await db.execute(sql.replace(f" {name}", f' disk."{name}"', 1))
+                    if type_ == "table":
+                        await db.execute(f'INSERT INTO disk."{name}" SELECT * FROM main."{name}"')
+        finally:
+            await db.execute("DETACH DATABASE disk")
+    finally:
+        await db.close()
+
     disk_db = await aiosqlite.connect(db_path)
-    await db.backup(disk_db)
-    await db.close()
+    await disk_db.executescript("""
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-65536;
+        ANALYZE;
+        PRAGMA optimize;
+    """)
     return disk_db
 
 
 async def create_posts_table(db):
-    """Create the posts table."""
+    """Create the posts table, clustered on (subreddit_name, pid) for keyset pagination."""
     await db.execute("""
         CREATE TABLE IF NOT EXISTS posts (
             subreddit_name TEXT,
@@ -112,35 +233,41 @@ async def create_posts_table(db):
             num_comments INTEGER,
             created_utc REAL,
             url TEXT,
-            pid TEXT
-        )
+            pid TEXT,
+            PRIMARY KEY (subreddit_name, pid)
+        ) WITHOUT ROWID
     """)
     await db.commit()
 
 
-async def select_posts_paginated(db, min_upvotes=5, min_comments=5, limit=100, offset=0):
-    """Select posts with minimum upvotes or comments, with pagination."""
+async def select_posts_after(db, last_subreddit="", last_pid="", limit=100):
+    """Select the next page of posts after (last_subreddit, last_pid), in primary-key order.
+
+    Pass the subreddit_name and pid of the last row of the previous page to continue;
+    the defaults start from the beginning. Each page is a range scan of the primary
+    key, so it costs O(limit) however deep it is.
+    """
     cursor = await db.execute("""
-        SELECT subreddit_name, json_response
+        SELECT subreddit_name, title, selftext, ups, num_comments, created_utc, url, pid
         FROM posts
-        LIMIT ? OFFSET ?
-    """, (limit, offset))
+        WHERE (subreddit_name, pid) > (?, ?)
+        ORDER BY subreddit_name, pid
+        LIMIT ?
+    """, (last_subreddit, last_pid, limit))
     return await cursor.fetchall()
 
 
-async def select_json_responses(db):
-    """Select all json_responses with subreddit_name."""
-    cursor = await db.execute("SELECT subreddit_name, json_response FROM subreddits WHERE json_response IS NOT NULL")
-    return await cursor.fetchall()
+async def insert_post(db, subreddit_name, title, selftext, ups, num_comments, created_utc, url, pid):
+    """Insert a post entry into the posts table."""
+    await insert_posts(db, [(subreddit_name, title, selftext, ups, num_comments, created_utc, url, pid)])
 
 
-async def drop_json_response_column(db):
-    """Drop the json_response column from subreddits table."""
-    await db.execute("ALTER TABLE subreddits DROP COLUMN json_response")
-    await db.commit()
+async def insert_posts(db, rows):
+    """Insert many post rows with chunked multi-row INSERTs.
 
-
-async def insert_post(db, subreddit_name, title, selftext, ups, num_comments, created_utc, url, pid):
-    """Insert a post entry into the posts table."""
-    await db.execute("INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (subreddit_name, title, selftext, ups, num_comments, created_utc, url, pid))
-    await db.commit()
+    Args:
+        db: Database connection
+        rows: Iterable of (subreddit_name, title, selftext, ups, num_comments, created_utc, url, pid).
+            A post already stored for the same subreddit is skipped.
+    """
+    await insert_many(db, "INSERT OR IGNORE INTO posts", 8, rows)
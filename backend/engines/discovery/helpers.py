@@ -2,8 +2,15 @@
 
 import random
 import asyncio
+import threading
 
-from .constants import USER_AGENTS, IMPERSONATE_TARGETS
+from curl_cffi import requests
+
+from .constants import USER_AGENT_VALUES, IMPERSONATE_TARGETS
+
+# One curl_cffi Session per thread: sessions aren't safe to share across threads,
+# and the sync scrapers run in asyncio.to_thread workers
+_thread_local = threading.local()
 
 
 async def add_jitter(min_delay: float = 0.5, max_delay: float = 2.5):
@@ -25,7 +32,7 @@ def get_random_user_agent() -> str:
     Returns:
         A random user agent string
     """
-    return random.choice(list(USER_AGENTS.values()))
+    return random.choice(USER_AGENT_VALUES)
 
 
 def get_random_impersonate_target() -> str:
@@ -38,70 +45,46 @@ def get_random_impersonate_target() -> str:
     return random.choice(IMPERSONATE_TARGETS)
 
 
-async def process_json_responses(db, query):
-    """Process JSON responses from database and populate posts table.
+def get_scrape_session() -> requests.Session:
+    """
+    Get this thread's persistent curl_cffi Session.
     
-    Args:
-        db: Database connection with subreddits table
-        query: The search query used for discovery
+    Reusing the session keeps connections to reddit.com alive between scrapes,
+    so only the first request on each thread pays the TCP+TLS handshake. The
+    impersonate target is picked once when the session is created, so every
+    request on a kept-alive connection presents the same browser fingerprint.
+    
+    Returns:
+        The calling thread's Session
+    """
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = _thread_local.session = requests.Session(impersonate=get_random_impersonate_target())
+    return session
+
+
+def new_scrape_async_session() -> requests.AsyncSession:
     """
-    import ast
-    from pathlib import Path
+    Create a curl_cffi AsyncSession with its impersonate target fixed for its lifetime.
     
-    # Import from local db module
-    from .db import (
-        select_json_responses,
-        create_posts_table,
-        insert_post,
-        drop_json_response_column,
-        migrate_to_disk
-    )
+    Like `get_scrape_session`, the target is picked once, so pooled connections never
+    rotate TLS fingerprints between requests.
     
-    json_responses = await select_json_responses(db)
-    await create_posts_table(db)
-
-    subreddit_after_list = []
-    for subreddit, json_resp in json_responses:
-        if not json_resp:
-            continue
-            
-        try:
-            # Parse the string representation of posts list
-            posts = ast.literal_eval(json_resp)
-        except Exception as e:
-            print(f"Error parsing json_resp for {subreddit}: {e}")
-            continue
-        
-        post_count = 0
-        for post in posts:
-            try:
-                # Extract fields from the new post format
-                title = post.get('post_title', '')
-                selftext = post.get('self_text', '')
-                ups = int(post.get('ups', 0) or 0)
-                num_comments = int(post.get('num_comments', 0) or 0)
-                
-                # Convert created_datetime (ISO format) to Unix timestamp
-                created_utc = 0
-                created_datetime = post.get('created_datetime', '')
-                if created_datetime:
-                    try:
-                        from datetime import datetime
-                        dt = datetime.fromisoformat(created_datetime.replace('Z', '+00:00'))
-                        created_utc = int(dt.timestamp())
-                    except Exception:
-                        pass
-                
-                url = post.get('post_url', '')
-                post_id = post.get('post_id', '').replace('t3_', '')  # Remove t3_ prefix if present
-                
-                await insert_post(db, subreddit, title, selftext, ups, num_comments, created_utc, url, post_id)
-                post_count += 1
-            except Exception as e:
-                print(f"Error inserting post for {subreddit}: {e}")
-                continue
-
-    await drop_json_response_column(db)
-    disk_db = await migrate_to_disk(db)
+    Returns:
+        A new AsyncSession; close it (or use it with `async with`) when done
+    """
+    return requests.AsyncSession(impersonate=get_random_impersonate_target())
+
+
+def xpath_has_class(name: str) -> str:
+    """
+    Build an XPath predicate matching elements whose class list contains `name`.
     
-    return disk_db
+    Matches whole class tokens, like BeautifulSoup's `class_=` filter.
+    """
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def stripped_text(element) -> str:
+    """Concatenate an lxml element's text nodes, each stripped (like BS4's get_text(strip=True))."""
+    return "".join(part.strip() for part in element.itertext())
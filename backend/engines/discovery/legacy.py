@@ -1,12 +1,26 @@
 """Legacy methods for subreddit discovery (deprecated)."""
 
+import logging
+
+import orjson
 from curl_cffi import requests as curl_requests
 from curl_cffi.requests import AsyncSession
-from datetime import datetime
+from datetime import datetime, timezone
+from pathlib import Path
 
-from typing import List
+from typing import List, Optional
 
 from .models import SubredditPost
+from .ratelimit import REDDIT_BUCKET
+
+log = logging.getLogger(__name__)
+
+_REDDIT_SEARCH_JSON_URL = "https://www.reddit.com/search.json"
+_REDDIT_SEARCH_PARAMS = {"sort": "relevance", "t": "month", "limit": 25}
+_REDDIT_SEARCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Mobile/15E148 Safari/604.1",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
 
 
 def find_subreddits_via_reddit_posts_search(query: str, min_comments: int = 10) -> List[str]:
@@ -16,16 +30,48 @@ def find_subreddits_via_reddit_posts_search(query: str, min_comments: int = 10)
     - Skip posts where `num_comments` is less than `min_comments`.
     - If a subreddit is already added, skip subsequent posts from the same subreddit.
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Mobile/15E148 Safari/604.1",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    }
-    url="https://www.reddit.com/search.json?q={query}&sort=relevance&t=month&limit=25"
+    try:
+        resp = curl_requests.get(
+            _REDDIT_SEARCH_JSON_URL,
+            headers=_REDDIT_SEARCH_HEADERS,
+            params={"q": query, **_REDDIT_SEARCH_PARAMS},
+            timeout=10,
+        )
+        resp.raise_for_status()
+        payload = orjson.loads(resp.content)
+    except Exception as exc:
+        raise RuntimeError(f"Failed to fetch posts from Reddit: {exc}") from exc
+
+    return parse_subreddits_from_search_json(payload, min_comments=min_comments)
+
 
+async def find_subreddits_via_reddit_posts_search_async(
+    query: str,
+    min_comments: int = 10,
+    session: Optional[AsyncSession] = None,
+) -> List[str]:
+    """Async variant of `find_subreddits_via_reddit_posts_search`.
+
+    Args:
+        query: Search query
+        min_comments: Minimum comments to include a subreddit
+        session: Shared AsyncSession to reuse pooled connections; a one-off
+            session is opened when omitted
+
+    Returns:
+        List of subreddit names
+    """
+    params = {"q": query, **_REDDIT_SEARCH_PARAMS}
     try:
-        resp = curl_requests.get(url, headers=headers, timeout=10)
+        await REDDIT_BUCKET.acquire()
+        if session is None:
+            async with AsyncSession() as client:
+                resp = await client.get(_REDDIT_SEARCH_JSON_URL, headers=_REDDIT_SEARCH_HEADERS, params=params, timeout=10)
+        else:
+            resp = await session.get(_REDDIT_SEARCH_JSON_URL, headers=_REDDIT_SEARCH_HEADERS, params=params, timeout=10)
+        REDDIT_BUCKET.update_from_headers(resp.headers)
         resp.raise_for_status()
-        payload = resp.json()
+        payload = orjson.loads(resp.content)
     except Exception as exc:
         raise RuntimeError(f"Failed to fetch posts from Reddit: {exc}") from exc
 
@@ -44,6 +90,7 @@ def parse_subreddits_from_search_json(payload: dict, min_comments: int = 10) ->
         List of subreddit names
     """
     results: List[str] = []
+    seen: set[str] = set()
 
     for child in payload.get("data", {}).get("children", []):
         if not isinstance(child, dict):
@@ -61,7 +108,8 @@ def parse_subreddits_from_search_json(payload: dict, min_comments: int = 10) ->
         if num_comments < min_comments:
             continue
 
-        if subreddit_prefixed and subreddit_prefixed not in results:
+        if subreddit_prefixed and subreddit_prefixed not in seen:
+            seen.add(subreddit_prefixed)
             results.append(subreddit_prefixed)
 
     return results
@@ -79,13 +127,10 @@ def test_find_subreddits_via_reddit_posts_search_json(file_path: str, min_commen
         List of subreddit names
     """
     try:
-        import json
-
-        with open(file_path, "r", encoding="utf-8") as handle:
-            payload = json.load(handle)
+        payload = orjson.loads(Path(file_path).read_bytes())
         return parse_subreddits_from_search_json(payload, min_comments=min_comments)
     except Exception as exc:
-        print(f"Failed to parse local JSON: {exc}")
+        log.warning("Failed to parse local JSON: %s", exc)
         return []
 
 
@@ -93,6 +138,7 @@ async def get_relevant_posts_from_subreddit_api(
     subreddit: str,
     query: str,
     timeout: int = 10,
+    session: Optional[AsyncSession] = None,
 ) -> List[SubredditPost]:
     """
     Fetch subreddit search results from the Reddit API and return normalized posts.
@@ -101,6 +147,8 @@ async def get_relevant_posts_from_subreddit_api(
         subreddit: Subreddit name (with or without r/)
         query: Search query
         timeout: Request timeout in seconds
+        session: Shared AsyncSession to reuse pooled connections; a one-off
+            session is opened when omitted
 
     Returns:
         List of normalized posts
@@ -113,15 +161,20 @@ async def get_relevant_posts_from_subreddit_api(
     params = {"q": query, "sort": "new", "restrict_sr": "1", "limit": 100, "include_over_18": "on"}
 
     try:
-        async with AsyncSession() as client:
-            resp_search = await client.get(search_url, headers=headers, params=params, timeout=timeout)
-            if resp_search.status_code != 200:
-                print(f"Failed to fetch posts for {subreddit}, status code: {resp_search.status_code}")
-                return []
-
-            payload = resp_search.json()
+        if session is None:
+            async with AsyncSession() as client:
+                resp_search = await client.get(search_url, headers=headers, params=params, timeout=timeout)
+        else:
+            resp_search = await session.get(search_url, headers=headers, params=params, timeout=timeout)
+        REDDIT_BUCKET.update_from_headers(resp_search.headers)
+
+        if resp_search.status_code != 200:
+            log.warning("Failed to fetch posts for %s, status code: %s", subreddit, resp_search.status_code)
+            return []
+
+        payload = orjson.loads(resp_search.content)
     except Exception as exc:
-        print(f"Failed to fetch posts from Reddit API: {exc}")
+        log.warning("Failed to fetch posts from Reddit API: %s", exc)
         return []
 
     return parse_subreddit_posts_from_api_json(payload)
@@ -140,12 +193,14 @@ def parse_subreddit_posts_from_api_json(payload: dict) -> List[SubredditPost]:
     results: List[SubredditPost] = []
     for child in payload.get("data", {}).get("children", []):
         data = child.get("data", {}) if isinstance(child, dict) else {}
-        created_utc = data.get("created_utc")
+        created_utc = 0
         created_datetime = ""
         try:
-            if created_utc is not None:
-                created_datetime = datetime.utcfromtimestamp(float(created_utc)).isoformat() + "Z"
+            if data.get("created_utc") is not None:
+                created_utc = int(float(data["created_utc"]))
+                created_datetime = datetime.fromtimestamp(created_utc, timezone.utc).isoformat().replace("+00:00", "Z")
         except Exception:
+            created_utc = 0
             created_datetime = ""
 
         permalink = data.get("permalink") or ""
@@ -160,6 +215,7 @@ def parse_subreddit_posts_from_api_json(payload: dict) -> List[SubredditPost]:
                 ups=int(data.get("ups") or 0),
                 num_comments=int(data.get("num_comments") or 0),
                 created_datetime=created_datetime,
+                created_utc=created_utc,
             )
         )
 
@@ -177,13 +233,10 @@ def test_get_relevant_posts_from_subreddit_api_json(file_path: str) -> List[Subr
         List of parsed posts
     """
     try:
-        import json
-
-        with open(file_path, "r", encoding="utf-8") as handle:
-            payload = json.load(handle)
+        payload = orjson.loads(Path(file_path).read_bytes())
         return parse_subreddit_posts_from_api_json(payload)
     except Exception as exc:
-        print(f"Failed to parse local JSON: {exc}")
+        log.warning("Failed to parse local JSON: %s", exc)
         return []
 
         
\ No newline at end of file
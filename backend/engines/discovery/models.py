@@ -1,5 +1,6 @@
 """Data models for the discovery module."""
 
+from dataclasses import dataclass
 from enum import Enum
 from typing import List
 from pydantic import BaseModel
@@ -16,8 +17,13 @@ class SubredditDiscovery(BaseModel):
     subreddits: List[str] = []
 
 
-class SubredditPost(BaseModel):
-    """Normalized model for a subreddit post."""
+@dataclass(slots=True)
+class SubredditPost:
+    """Normalized model for a subreddit post.
+
+    A slotted dataclass rather than a pydantic model: one is built per scraped post,
+    and every producer already hands over clean str/int values.
+    """
     post_id: str = ""
     post_url: str = ""
     post_title: str = ""
@@ -25,3 +31,5 @@ class SubredditPost(BaseModel):
     ups: int = 0
     num_comments: int = 0
     created_datetime: str = ""
+    # Unix seconds, 0 when unknown; producers fill it so consumers never re-parse created_datetime
+    created_utc: int = 0
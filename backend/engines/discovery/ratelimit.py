@@ -0,0 +1,9 @@
+"""Request pacing for the discovery module."""
+
+from ..ratelimit import TokenBucket
+
+# Reddit allows about 60 requests a minute per client
+REDDIT_BUCKET = TokenBucket(rate=1.0, burst=5)
+
+
+__all__ = ["TokenBucket", "REDDIT_BUCKET"]
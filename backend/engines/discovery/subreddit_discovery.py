@@ -1,16 +1,41 @@
 """Subreddit discovery via Reddit search scraping."""
 
-from bs4 import BeautifulSoup
-from typing import List
-from curl_cffi import requests
+import asyncio
+import logging
+
+from curl_cffi.requests import AsyncSession
+from lxml import etree, html
+from typing import List, Optional
 
 from .constants import REDDIT_SEARCH_TEMPLATE
-from .helpers import get_random_impersonate_target
+from .ratelimit import REDDIT_BUCKET
+from .helpers import get_scrape_session, new_scrape_async_session, stripped_text, xpath_has_class
+
+log = logging.getLogger(__name__)
+
+
+# Compiled once: for each result of the second search-result-listing (the first lists
+# posts' own subreddits less reliably), the subreddit link in its metadata. Positional
+# [1] steps apply per result, so one evaluation walks the whole page
+_XP_SUBREDDIT_LINKS = etree.XPath(
+    f"(//div[{xpath_has_class('search-result-listing')}])[2]"
+    f"/descendant::div[{xpath_has_class('contents')}][1]"
+    f"/descendant::div[{xpath_has_class('search-result')}]"
+    f"/descendant::div[{xpath_has_class('search-result-meta')}][1]"
+    "/descendant::span[not(@class)][1]/descendant::a[1]"
+)
+
+
+def _subreddits_from_search_page(tree: html.HtmlElement) -> List[str]:
+    """Extract the subreddit names listed in a parsed Reddit search page."""
+    anchor_texts = {stripped_text(link) for link in _XP_SUBREDDIT_LINKS(tree)}
+    log.debug("Found %d subreddits in search results", len(anchor_texts))
+    return list(anchor_texts)
 
 
 def scrape_reddit_search(query: str) -> List[str]:
     """
-    Scrape Reddit search results using Beautiful Soup with curl_cffi browser impersonation.
+    Scrape Reddit search results using lxml with curl_cffi browser impersonation.
     
     Args:
         query: The search query (e.g., 'openai')
@@ -22,68 +47,48 @@ def scrape_reddit_search(query: str) -> List[str]:
     url = REDDIT_SEARCH_TEMPLATE.format(query=query)
     
     try:
-        # Select random impersonate target for browser mimicking
-        impersonate_target = get_random_impersonate_target()
-        
-        # Fetch the page with curl_cffi for browser impersonation
-        response = requests.get(url, impersonate=impersonate_target, timeout=10)
+        # Fetch the page with curl_cffi; the session carries its impersonate target
+        response = get_scrape_session().get(url, timeout=10)
         response.raise_for_status()
         
-        # Parse with Beautiful Soup
-        soup = BeautifulSoup(response.content, 'lxml')
-        
-        anchor_texts = set()
-        
-        # Find all divs with class search-result-listing
-        search_listing_divs = soup.find_all('div', class_='search-result-listing')
-        print(f"Found {len(search_listing_divs)} search-result-listing divs")
+        # Decoded text (charset from the response headers) avoids a second encoding sniff
+        return _subreddits_from_search_page(html.document_fromstring(response.text))
+    
+    except Exception as e:
+        log.warning("Error fetching the page: %s", e)
+        return []
+
+
+async def scrape_reddit_search_async(query: str, session: Optional[AsyncSession] = None) -> List[str]:
+    """
+    Async variant of `scrape_reddit_search` on a curl_cffi AsyncSession.
+    
+    Args:
+        query: The search query (e.g., 'openai')
+        session: Shared AsyncSession (see `new_scrape_async_session`) to reuse
+            pooled connections; a one-off session is opened when omitted
         
-        # Get the second one (index 1)
-        if len(search_listing_divs) > 1:
-            second_listing = search_listing_divs[1]
-            print("Found second search-result-listing div")
-            
-            # Find the div with class contents inside it
-            contents_div = second_listing.find('div', class_='contents')
-            
-            if contents_div:
-                print("Found contents div")
-                
-                # Find all divs with class search-result inside contents
-                search_results = contents_div.find_all('div', class_='search-result')
-                print(f"Found {len(search_results)} search-result divs")
-                
-                # Loop through each search-result div
-                for idx, result in enumerate(search_results):
-                    print(f"\n--- Result {idx + 1} ---")
-                    
-                    # Find the div with class search-result-meta
-                    meta_div = result.find('div', class_='search-result-meta')
-                    
-                    if meta_div:
-                        # Find span with no class name that contains an <a> tag
-                        span = meta_div.find('span', class_=False)
-                        
-                        if span:
-                            # Find the <a> tag inside the span
-                            link = span.find('a')
-                            
-                            if link:
-                                # Extract text from the <a> tag (subreddit name)
-                                link_text = link.get_text(strip=True)
-                                print(f"Subreddit: {link_text}")
-                                anchor_texts.add(link_text)
-            else:
-                print("Contents div not found")
+    Returns:
+        List of subreddit names found in the search results
+    """
+    url = REDDIT_SEARCH_TEMPLATE.format(query=query)
+    
+    try:
+        # Shares the per-client Reddit budget with the JSON search and subreddit fetches
+        await REDDIT_BUCKET.acquire()
+        # The session carries its impersonate target
+        if session is None:
+            async with new_scrape_async_session() as client:
+                response = await client.get(url, timeout=10)
         else:
-            print("Second search-result-listing div not found")
-        
-        print(f"\n\n=== All subreddits found ({len(anchor_texts)} total) ===")
-        for text in anchor_texts:
-            print(text)
+            response = await session.get(url, timeout=10)
+        REDDIT_BUCKET.update_from_headers(response.headers)
+        response.raise_for_status()
         
-        return list(anchor_texts)
+        # Parse in a worker thread so the event loop keeps serving other fetches
+        tree = await asyncio.to_thread(html.document_fromstring, response.text)
+        return _subreddits_from_search_page(tree)
     
     except Exception as e:
-        print(f"Error fetching the page: {e}")
+        log.warning("Error fetching the page: %s", e)
         return []
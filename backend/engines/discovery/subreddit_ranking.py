@@ -1,199 +1,182 @@
 """Subreddit ranking via search result scraping."""
 
-from bs4 import BeautifulSoup, Tag
-from typing import List, Optional
-from curl_cffi import requests
+import asyncio
+import logging
+import re
+from datetime import datetime
+from io import BytesIO
+
+from curl_cffi.requests import AsyncSession
+from lxml import etree, html
+from typing import List, Optional, Tuple
 
 from .constants import SUBREDDIT_SEARCH_TEMPLATE
-from .helpers import get_random_impersonate_target
+from .helpers import get_scrape_session, new_scrape_async_session, stripped_text, xpath_has_class
 from .models import SubredditPost
 
-
-def _extract_post_id(result: Tag) -> str:
-    """Extract post ID from data-fullname attribute."""
-    post_id = result.get('data-fullname', '')
-    return post_id
-
-
-def _extract_post_title_and_url(result: Tag) -> SubredditPost:
-    """Extract post title and URL from the result element."""
-    data = SubredditPost()
-    
-    # Find classless div within search-result
-    classless_div = result.find('div', class_=False)
-    
-    if classless_div:
-        # Find header
-        header = classless_div.find('header')
-        
-        if header:
-            # Find the <a> tag
-            link = header.find('a')
-            
-            if link:
-                # Extract post url (href)
-                post_url = link.get('href', '')
-                data.post_url = post_url or ""
-                
-                # Extract post title (combine mark tag and plain text)
-                title_parts = []
-                for child in link.children:
-                    if child.name == 'mark':
-                        title_parts.append(child.get_text(strip=True))
-                    elif isinstance(child, str):
-                        text = child.strip()
-                        if text:
-                            title_parts.append(text)
-                
-                post_title = ''.join(title_parts)
-                data.post_title = post_title or ""
-    
-    return data
-
-
-def _extract_metadata(result: Tag) -> SubredditPost:
-    """Extract upvotes, comments count, and created datetime from metadata div."""
-    data = SubredditPost()
-    
-    meta_div = result.find('div', class_='search-result-meta')
-    if not meta_div:
-        return data
-    
-    # Extract upvotes
-    score_span = meta_div.find('span', class_='search-score')
-    if score_span:
-        upvotes_text = score_span.get_text(strip=True)
-        # Extract number from "1,243 points" format
-        upvotes_num_str = upvotes_text.split()[0].replace(',', '') if upvotes_text else '0'
-        try:
-            upvotes_num = int(upvotes_num_str)
-        except ValueError:
-            upvotes_num = 0
-        data.ups = upvotes_num
-    
-    # Extract num_comments from search-comments link
-    comments_link = meta_div.find('a', class_='search-comments')
-    if comments_link:
-        comments_text = comments_link.get_text(strip=True)
-        # Extract number from "1,243 comments" format
-        num_comments_str = comments_text.split()[0].replace(',', '') if comments_text else '0'
+log = logging.getLogger(__name__)
+
+
+# Leading number (with thousands separators) of a score/comments label; scores of
+# downvoted posts are negative
+_COUNT_RE = re.compile(r'-?\d[\d,]*')
+
+# Compiled once; each is evaluated relative to the element it is called on
+_XP_FIRST_LISTING = etree.XPath(f"(//div[{xpath_has_class('search-result-listing')}])[1]")
+_XP_LISTING_RESULTS = etree.XPath(
+    f"(descendant::div[{xpath_has_class('contents')}])[1]/descendant::div[{xpath_has_class('search-result')}]"
+)
+_XP_TITLE_LINK = etree.XPath("(descendant::div[not(@class)])[1]/descendant::header[1]/descendant::a[1]")
+_XP_META = etree.XPath(f"descendant::div[{xpath_has_class('search-result-meta')}][1]")
+_XP_SCORE = etree.XPath(f"descendant::span[{xpath_has_class('search-score')}][1]")
+_XP_COMMENTS = etree.XPath(f"descendant::a[{xpath_has_class('search-comments')}][1]")
+_XP_DATETIME = etree.XPath(f"string(descendant::span[{xpath_has_class('search-time')}][1]/descendant::time[1]/@datetime)")
+_XP_BODY_PARAGRAPHS = etree.XPath(
+    f"descendant::div[{xpath_has_class('search-expando')}][1]"
+    f"/descendant::div[{xpath_has_class('search-result-body')}][1]/descendant::p"
+)
+
+
+def _parse_count(text: str) -> int:
+    """Parse the leading number of a '1,243 points' / '1,243 comments' label, or 0."""
+    match = _COUNT_RE.match(text)
+    return int(match.group().replace(',', '')) if match else 0
+
+
+def _extract_post_title_and_url(result) -> Tuple[str, str]:
+    """Extract post title and URL from the header link of the result element."""
+    links = _XP_TITLE_LINK(result)
+    if not links:
+        return "", ""
+    link = links[0]
+
+    # Combine highlighted <mark> text with the plain text around it
+    title_parts = []
+    if link.text and link.text.strip():
+        title_parts.append(link.text.strip())
+    for child in link:
+        if child.tag == 'mark':
+            title_parts.append(stripped_text(child))
+        if child.tail and child.tail.strip():
+            title_parts.append(child.tail.strip())
+
+    return link.get('href') or "", ''.join(title_parts)
+
+
+def _extract_metadata(result) -> Tuple[int, int, str, int]:
+    """Extract upvotes, comments count, and created datetime/timestamp from the metadata div."""
+    metas = _XP_META(result)
+    if not metas:
+        return 0, 0, "", 0
+    meta_div = metas[0]
+
+    score_spans = _XP_SCORE(meta_div)
+    ups = _parse_count(stripped_text(score_spans[0])) if score_spans else 0
+
+    comment_links = _XP_COMMENTS(meta_div)
+    num_comments = _parse_count(stripped_text(comment_links[0])) if comment_links else 0
+
+    created_datetime = _XP_DATETIME(meta_div)
+    created_utc = 0
+    if created_datetime:
         try:
-            num_comments = int(num_comments_str)
+            created_utc = int(datetime.fromisoformat(created_datetime.replace('Z', '+00:00')).timestamp())
         except ValueError:
-            num_comments = 0
-        data.num_comments = num_comments
-    
-    # Extract created_datetime from time tag
-    time_span = meta_div.find('span', class_='search-time')
-    if time_span:
-        time_tag = time_span.find('time')
-        if time_tag:
-            created_datetime = time_tag.get('datetime', '')
-            data.created_datetime = created_datetime or ""
-    
-    return data
+            pass
 
+    return ups, num_comments, created_datetime, created_utc
 
-def _extract_self_text(result: Tag) -> Optional[str]:
-    """Extract self text from the expando div."""
-    expando_div = result.find('div', class_='search-expando')
-    if expando_div:
-        body_div = expando_div.find('div', class_='search-result-body')
-        if body_div:
-            paragraphs = body_div.find_all('p')
-            self_text_parts = [p.get_text(strip=True) for p in paragraphs]
-            self_text = ' '.join(self_text_parts)
-            return self_text
-    return None
 
-
-def _parse_search_result(result: Tag, idx: int) -> SubredditPost:
+def _parse_search_result(result) -> SubredditPost:
     """Parse a single search result element into a SubredditPost."""
-
-    result_data = SubredditPost(post_id=_extract_post_id(result))
-
-    # Extract post title and URL
-    title_url_data = _extract_post_title_and_url(result)
-
-    # Extract metadata (upvotes, comments, datetime)
-    metadata = _extract_metadata(result)
-
-    # Extract self text
-    self_text = _extract_self_text(result)
-
-    update_data = {
-        **title_url_data.model_dump(exclude_defaults=True),
-        **metadata.model_dump(exclude_defaults=True),
-    }
-    if self_text:
-        update_data["self_text"] = self_text
-
-    result_data = result_data.model_copy(update=update_data)
-
-    return result_data
-
-
-def _parse_search_results_from_listing(listing: Tag) -> List[SubredditPost]:
-    """Parse all search results from a listing div."""
-    results: List[SubredditPost] = []
-    
-    # Find the div with class contents inside it
-    contents_div = listing.find('div', class_='contents')
-    
-    if not contents_div:
-        return results
-    
-    # Find all divs with class search-result inside contents
-    search_results = contents_div.find_all('div', class_='search-result')
-    
-    # Loop through each search-result div
-    for idx, result in enumerate(search_results):
-        result_data = _parse_search_result(result, idx)
-        results.append(result_data)
-    
-    return results
-
-
-def _fetch_page(url: str) -> Optional[BeautifulSoup]:
-    """Fetch a page and return parsed BeautifulSoup object."""
-    # Select random impersonate target for browser mimicking
-    impersonate_target = get_random_impersonate_target()
-    
-    # Fetch the page with curl_cffi for browser impersonation
-    response = requests.get(url, impersonate=impersonate_target, timeout=10)
+    post_url, post_title = _extract_post_title_and_url(result)
+    ups, num_comments, created_datetime, created_utc = _extract_metadata(result)
+    self_text = ' '.join(stripped_text(p) for p in _XP_BODY_PARAGRAPHS(result))
+
+    return SubredditPost(
+        post_id=result.get('data-fullname') or "",
+        post_url=post_url,
+        post_title=post_title,
+        self_text=self_text,
+        ups=ups,
+        num_comments=num_comments,
+        created_datetime=created_datetime,
+        created_utc=created_utc,
+    )
+
+
+def _fetch_page(url: str) -> Tuple[bytes, str]:
+    """Fetch a page and return its raw body and character encoding."""
+    # Fetch the page with curl_cffi; the session carries its impersonate target
+    response = get_scrape_session().get(url, timeout=10)
     response.raise_for_status()
     
-    
-    # Parse with Beautiful Soup
-    return BeautifulSoup(response.content, 'lxml')
+    return response.content, response.encoding or 'utf-8'
 
 
-def scrape_subreddit_search_page(soup: BeautifulSoup) -> List[SubredditPost]:
+def scrape_subreddit_search_page(tree: html.HtmlElement) -> List[SubredditPost]:
     """
-    Scrape a single page of subreddit search results from a BeautifulSoup object.
+    Scrape a single page of subreddit search results from a parsed lxml document.
     
     Args:
-        soup: Parsed HTML for the subreddit search page
+        tree: Parsed HTML for the subreddit search page
         
     Returns:
         List containing results
     """
     try:
-        # Find all divs with class search-result-listing
-        search_listing_divs = soup.find_all('div', class_='search-result-listing')
-
-        # Get the first one (index 0)
-        if len(search_listing_divs) > 0:
-            first_listing = search_listing_divs[0]
-            return _parse_search_results_from_listing(first_listing)
-        else:
+        # Results live in the first search-result-listing div
+        listings = _XP_FIRST_LISTING(tree)
+        if not listings:
             return []
+        return [_parse_search_result(result) for result in _XP_LISTING_RESULTS(listings[0])]
 
     except Exception as e:
-        print(f"Error parsing the page: {e}")
+        log.warning("Error parsing the page: %s", e)
         return []
 
 
+def _has_class_token(element, name: str) -> bool:
+    """Whether `name` is one of the element's class tokens."""
+    return name in (element.get('class') or '').split()
+
+
+def scrape_subreddit_search_stream(content: bytes, encoding: str = 'utf-8') -> List[SubredditPost]:
+    """
+    Scrape a subreddit search page incrementally instead of building the full tree.
+    
+    Each search-result div of the first listing is parsed as soon as its end tag is
+    read, then cleared and detached, so memory stays around the size of one result.
+    Parsing stops when the first listing closes.
+    
+    Args:
+        content: Raw HTML of the subreddit search page
+        encoding: Character encoding of `content`
+        
+    Returns:
+        List containing results
+    """
+    posts = []
+    in_listing = False
+    try:
+        for event, elem in etree.iterparse(
+            BytesIO(content), events=('start', 'end'), tag='div', html=True, encoding=encoding
+        ):
+            if _has_class_token(elem, 'search-result-listing'):
+                if event == 'start':
+                    in_listing = True
+                    continue
+                break
+            if event == 'end' and in_listing and _has_class_token(elem, 'search-result'):
+                posts.append(_parse_search_result(elem))
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+    except Exception as e:
+        log.warning("Error parsing the page: %s", e)
+    return posts
+
+
 def get_relevant_posts_from_subreddit(subreddit: str, query: str) -> List[SubredditPost]:
     """
     Scrape subreddit search results with a single page request.
@@ -208,15 +191,51 @@ def get_relevant_posts_from_subreddit(subreddit: str, query: str) -> List[Subred
     # Build the URL from template
     url = SUBREDDIT_SEARCH_TEMPLATE.format(subreddit=subreddit, query=query)
     
-    print(f"Scraping URL: {url}")
+    log.debug("Scraping URL: %s", url)
 
-    soup = _fetch_page(url)
-    if not soup:
-        return []
+    content, encoding = _fetch_page(url)
+    page_results = scrape_subreddit_search_stream(content, encoding)
+
+    log.debug("Scrape complete. Results: %d", len(page_results))
+
+    return page_results
+
+
+async def get_relevant_posts_from_subreddit_async(
+    subreddit: str,
+    query: str,
+    session: Optional[AsyncSession] = None,
+) -> List[SubredditPost]:
+    """
+    Async variant of `get_relevant_posts_from_subreddit` on a curl_cffi AsyncSession.
+    
+    Args:
+        subreddit: The subreddit name to search in (e.g., 'OpenAI')
+        query: The search query (e.g., 'openai')
+        session: Shared AsyncSession (see `new_scrape_async_session`) to reuse
+            pooled connections; a one-off session is opened when omitted
+        
+    Returns:
+        List of results from the page
+    """
+    url = SUBREDDIT_SEARCH_TEMPLATE.format(subreddit=subreddit, query=query)
+    
+    log.debug("Scraping URL: %s", url)
+
+    # The session carries its impersonate target
+    if session is None:
+        async with new_scrape_async_session() as client:
+            response = await client.get(url, timeout=10)
+    else:
+        response = await session.get(url, timeout=10)
+    response.raise_for_status()
 
-    page_results = scrape_subreddit_search_page(soup)
+    # lxml releases the GIL while parsing, so a worker thread parses in parallel with the loop
+    page_results = await asyncio.to_thread(
+        scrape_subreddit_search_stream, response.content, response.encoding or 'utf-8'
+    )
 
-    print(f"Scrape complete. Results: {len(page_results)}")
+    log.debug("Scrape complete. Results: %d", len(page_results))
 
     return page_results
 
@@ -233,9 +252,8 @@ def test_get_relevant_posts_from_subreddit(file_path: str) -> List[SubredditPost
     """
     try:
         with open(file_path, "r", encoding="utf-8") as handle:
-            html = handle.read()
-        soup = BeautifulSoup(html, "lxml")
-        return scrape_subreddit_search_page(soup)
+            page = handle.read()
+        return scrape_subreddit_search_page(html.document_fromstring(page))
     except Exception as exc:
-        print(f"Failed to parse local HTML: {exc}")
+        log.warning("Failed to parse local HTML: %s", exc)
         return []
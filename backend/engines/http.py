@@ -0,0 +1,40 @@
+"""Process-wide HTTP clients shared by the engines."""
+
+import httpx
+
+# Same hosts are hit repeatedly (Google, Reddit, the LLM provider), so pooled
+# keep-alive connections skip the TCP+TLS handshake after the first request
+_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+_http_client: httpx.AsyncClient | None = None
+_sync_http_client: httpx.Client | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it on first use or after it was closed."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=10, limits=_LIMITS)
+    return _http_client
+
+
+def get_sync_http_client() -> httpx.Client:
+    """Return the shared blocking Client (thread-safe) for the sync code paths."""
+    global _sync_http_client
+    if _sync_http_client is None or _sync_http_client.is_closed:
+        _sync_http_client = httpx.Client(timeout=10, limits=_LIMITS)
+    return _sync_http_client
+
+
+async def close_http_client():
+    """Close the shared clients, if they were created."""
+    global _http_client, _sync_http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    if _sync_http_client is not None:
+        _sync_http_client.close()
+        _sync_http_client = None
+
+
+__all__ = ["get_http_client", "get_sync_http_client", "close_http_client"]
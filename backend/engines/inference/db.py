@@ -1,16 +1,28 @@
 """Database operations for the inference module."""
 
 import aiosqlite
+from contextlib import asynccontextmanager
 from typing import List
 
+from ..sqlite import SQLITE_MAX_VARIABLES, insert_many, transaction
 
-def get_db_connection(db_path: str):
-    """Returns an active connection to the database."""
-    return aiosqlite.connect(db_path)
+
+@asynccontextmanager
+async def get_db_connection(db_path: str):
+    """Open a connection to the database as an async context manager."""
+    async with aiosqlite.connect(db_path) as db:
+        # WAL + NORMAL sync: commits append to the log without an fsync each time
+        await db.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-65536;
+        """)
+        yield db
 
 
 async def create_triplets_table(db):
-    """Create the triplets table."""
+    """Create the triplets table and its post_id index; the caller commits."""
     await db.execute("""
         CREATE TABLE IF NOT EXISTS triplets (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -23,33 +35,59 @@ async def create_triplets_table(db):
             justification TEXT
         )
     """)
-    await db.commit()
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_triplets_post_id ON triplets(post_id)")
+
+
+async def insert_triplets_batch(db, triplets: List[tuple]):
+    """Insert multiple triplets with chunked multi-row INSERTs; the caller commits."""
+    await insert_many(
+        db,
+        "INSERT INTO triplets (subject, relationship, object, evidence, post_id, post_url, justification)",
+        7,
+        triplets,
+    )
 
 
-async def insert_triplet(db, subject: str, relationship: str, object: str, evidence: str, post_id: str, post_url: str, justification: str):
-    """Insert a triplet into the database."""
+async def create_triplet_cache_table(db):
+    """Create the table caching raw LLM analyses by post-text hash."""
     await db.execute("""
-        INSERT INTO triplets (subject, relationship, object, evidence, post_id, post_url, justification)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (subject, relationship, object, evidence, post_id, post_url, justification))
-    await db.commit()
+        CREATE TABLE IF NOT EXISTS triplet_cache (
+            post_hash BLOB PRIMARY KEY,
+            json BLOB NOT NULL
+        ) WITHOUT ROWID
+    """)
 
 
-async def insert_triplets_batch(db, triplets: List[tuple]):
-    """Insert multiple triplets in a single transaction."""
-    await db.executemany("""
-        INSERT INTO triplets (subject, relationship, object, evidence, post_id, post_url, justification)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, triplets)
-    await db.commit()
+async def fetch_cached_analyses(db, post_hashes: List[bytes]) -> dict[bytes, bytes]:
+    """Return the cached analysis JSON for each of `post_hashes` that has one."""
+    cached: dict[bytes, bytes] = {}
+    # Chunked to stay under SQLite's bound-parameter limit
+    for start in range(0, len(post_hashes), SQLITE_MAX_VARIABLES):
+        chunk = post_hashes[start:start + SQLITE_MAX_VARIABLES]
+        placeholders = ",".join("?" * len(chunk))
+        async with db.execute(
+            f"SELECT post_hash, json FROM triplet_cache WHERE post_hash IN ({placeholders})", chunk
+        ) as cursor:
+            cached.update((post_hash, blob) for post_hash, blob in await cursor.fetchall())
+    return cached
+
+
+async def insert_cached_analyses(db, rows: List[tuple]):
+    """Insert (post_hash, json) cache rows with one executemany; the caller commits."""
+    await db.executemany("INSERT OR REPLACE INTO triplet_cache (post_hash, json) VALUES (?, ?)", rows)
 
 
 async def fetch_all_posts(db) -> List[dict]:
     """Retrieves all posts from the DB and returns them as a list of dicts."""
-    db.row_factory = aiosqlite.Row
-    async with db.execute("SELECT pid as id, subreddit_name, title, selftext, url FROM posts") as cursor:
-        rows = await cursor.fetchall()
-        return [
-            {"id": row["id"], "subreddit": row["subreddit_name"], "text": f"{row['title']}\n{row['selftext']}", "url": row["url"]} 
-            for row in rows
-        ]
+    # SQLite joins title and body, and plain tuples avoid a Row object per post
+    posts = []
+    async with db.execute("""
+        SELECT pid, subreddit_name, coalesce(title, '') || char(10) || coalesce(selftext, ''), url
+        FROM posts
+    """) as cursor:
+        while rows := await cursor.fetchmany(1000):
+            posts.extend(
+                {"id": pid, "subreddit": subreddit, "text": text, "url": url}
+                for pid, subreddit, text, url in rows
+            )
+    return posts
@@ -1,15 +1,223 @@
-from typing import List
+from typing import List, Optional, Tuple
 import asyncio
+import hashlib
+import logging
+import os
 import time
-import json
+import weakref
+
+import orjson
 
 from .models import (
+    BatchExtraction,
     PostAnalysis,
     ResolvedTriplet,
     ResolvedPostAnalysis,
 )
+from ..ratelimit import TokenBucket
+from .text_processing import minify_text
 from .llm_client import get_llm_triplets_async, resolve_entity_names_async
-from .db import fetch_all_posts, create_triplets_table, insert_triplets_batch
+from .db import (
+    fetch_all_posts,
+    create_triplets_table,
+    insert_triplets_batch,
+    create_triplet_cache_table,
+    fetch_cached_analyses,
+    insert_cached_analyses,
+    transaction,
+)
+
+log = logging.getLogger(__name__)
+
+
+# Unresolved canonical names that trigger a background resolution call; the chunks'
+# masters are resolved together once extraction finishes
+RESOLVE_CHUNK_SIZE = 64
+
+
+def _collect_canonical_names(extractions: List[PostAnalysis], seen: set[str]) -> set[str]:
+    """Return the triplet subject/object canonical names not already in `seen`, adding them to it."""
+    new_names: set[str] = set()
+    for extraction in extractions:
+        for triplet in extraction.triplets:
+            new_names.add(triplet.subject.canonical_name)
+            new_names.add(triplet.object.canonical_name)
+    new_names -= seen
+    seen |= new_names
+    return new_names
+
+
+async def _gather_name_mappings(resolve_tasks: List[asyncio.Task]) -> dict[str, str]:
+    """
+    Await the chunked resolution calls and merge their partial mappings.
+    
+    Each chunk only sees its own names, so variants that landed in different chunks
+    are merged by one more resolution pass over the chunks' distinct master names.
+    """
+    name_mapping: dict[str, str] = {}
+    for partial in await asyncio.gather(*resolve_tasks):
+        name_mapping.update(partial)
+    if len(resolve_tasks) > 1:
+        master_mapping = await resolve_entity_names_async(list(dict.fromkeys(name_mapping.values())))
+        name_mapping = {name: master_mapping.get(master, master) for name, master in name_mapping.items()}
+    return name_mapping
+
+
+# Prompt budget per extraction batch, estimated at ~4 characters per token
+MAX_BATCH_TOKENS = 24000
+# Cap on posts per batch, which bounds the size of the structured response (one
+# PostAnalysis per post must fit the extractor's 16k max_tokens); larger batches
+# send the system prompt once for more posts and cut the number of requests
+MAX_BATCH_POSTS = 100
+
+
+def _minify_posts(posts: List[dict]) -> None:
+    """Minify each post's text in place, so batch sizing sees what is actually sent."""
+    for post in posts:
+        post["text"] = minify_text(post["text"])
+
+
+def _pack_batches(posts: List[dict], max_tokens: int = MAX_BATCH_TOKENS) -> List[List[dict]]:
+    """Greedily fill batches up to `max_tokens` estimated tokens or MAX_BATCH_POSTS posts."""
+    batches: List[List[dict]] = []
+    batch: List[dict] = []
+    batch_tokens = 0
+    for post in posts:
+        tokens = len(post["text"]) // 4 + 1
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) >= MAX_BATCH_POSTS):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(post)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+# Caps in-flight extraction calls, and paces their starts to LLM_RPM requests a minute,
+# so a large run stays under the provider's rate limit instead of backing off on 429s
+_LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+_LLM_RATE = float(os.getenv("LLM_RPM", "120")) / 60
+# Per event loop, since asyncio primitives are bound to the loop that first waits on them
+_llm_limits_by_loop: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _llm_limits() -> Tuple[asyncio.Semaphore, TokenBucket]:
+    """Return the running loop's extraction semaphore and token bucket, creating them on first use."""
+    loop = asyncio.get_running_loop()
+    limits = _llm_limits_by_loop.get(loop)
+    if limits is None:
+        limits = _llm_limits_by_loop[loop] = (
+            asyncio.Semaphore(_LLM_CONCURRENCY),
+            TokenBucket(rate=_LLM_RATE, burst=_LLM_CONCURRENCY),
+        )
+    return limits
+
+
+async def _extract_batch(batch: List[dict]) -> BatchExtraction:
+    """
+    Run one extraction batch once a concurrency slot is free.
+    
+    Results are aligned to the batch by post_id: analyses for ids not in the batch
+    are dropped, and posts the model skipped are re-queued once as a smaller batch.
+    """
+    llm_sem, llm_bucket = _llm_limits()
+    async with llm_sem, llm_bucket:
+        extraction = await get_llm_triplets_async(batch)
+
+    results_by_id = {}
+    batch_ids = {post["id"] for post in batch}
+    for analysis in extraction.results:
+        if analysis.post_id in batch_ids:
+            results_by_id.setdefault(analysis.post_id, analysis)
+
+    missing = [post for post in batch if post["id"] not in results_by_id]
+    if missing:
+        log.info("Re-queueing %d of %d posts missing from the batch response", len(missing), len(batch))
+        async with llm_sem, llm_bucket:
+            retry = await get_llm_triplets_async(missing)
+        missing_ids = {post["id"] for post in missing}
+        for analysis in retry.results:
+            if analysis.post_id in missing_ids:
+                results_by_id.setdefault(analysis.post_id, analysis)
+
+    return BatchExtraction(results=list(results_by_id.values()))
+
+
+# Queued analyses committed to the triplet cache mid-run (about four full batches), so a
+# crashed run resumes from the cache instead of re-calling the LLM
+CACHE_FLUSH_ROWS = 100
+
+
+def _post_hash(post: dict) -> bytes:
+    """Hash a post's text; posts with identical text share one LLM analysis."""
+    return hashlib.blake2b(post["text"].encode(), digest_size=16).digest()
+
+
+def _for_posts(analysis: PostAnalysis, posts: List[dict]) -> List[PostAnalysis]:
+    """Copy an analysis onto other posts with the same text."""
+    return [
+        analysis.model_copy(update={"post_id": post["id"], "post_url": post["url"]})
+        for post in posts
+    ]
+
+
+async def _split_cached_posts(db, posts: List[dict]) -> Tuple[List[PostAnalysis], List[dict], dict[bytes, List[dict]]]:
+    """
+    Partition posts into cached analyses and the unique posts that still need the LLM.
+    
+    Args:
+        db: Active database connection
+        posts: Posts as returned by fetch_all_posts
+        
+    Returns:
+        Analyses served from the cache, one post per uncached text, and all posts
+        grouped by text hash
+    """
+    await create_triplet_cache_table(db)
+    posts_by_hash: dict[bytes, List[dict]] = {}
+    for post in posts:
+        posts_by_hash.setdefault(_post_hash(post), []).append(post)
+
+    cached = await fetch_cached_analyses(db, list(posts_by_hash))
+    cached_extractions: List[PostAnalysis] = []
+    to_extract: List[dict] = []
+    for post_hash, group in posts_by_hash.items():
+        blob = cached.get(post_hash)
+        if blob is None:
+            to_extract.append(group[0])
+        else:
+            cached_extractions.extend(_for_posts(PostAnalysis.model_validate_json(blob), group))
+    return cached_extractions, to_extract, posts_by_hash
+
+
+def _expand_batch_results(
+    results: List[PostAnalysis],
+    hash_by_post_id: dict[str, bytes],
+    posts_by_hash: dict[bytes, List[dict]],
+    cache_rows: List[tuple],
+) -> List[PostAnalysis]:
+    """Fan batch results out to duplicate posts and queue them for the cache."""
+    expanded: List[PostAnalysis] = []
+    for analysis in results:
+        expanded.append(analysis)
+        post_hash = hash_by_post_id.get(analysis.post_id)
+        if post_hash is None:
+            continue
+        expanded.extend(_for_posts(analysis, posts_by_hash[post_hash][1:]))
+        # get_llm_triplets marks failed batches with an "Error" justification; retry those next run
+        if analysis.justification != "Error":
+            # post_url belongs to the post, not the text (copies get their own), and an unset
+            # one dumps as null, which the str field rejects when the row is read back
+            cache_rows.append((post_hash, analysis.model_dump_json(exclude={"post_url"})))
+    return expanded
+
+
+async def _flush_cache_rows(db, cache_rows: List[tuple]) -> None:
+    """Commit the queued cache rows and clear the queue."""
+    async with transaction(db):
+        await insert_cached_analyses(db, cache_rows)
+    cache_rows.clear()
 
 
 async def run_parallel_extraction(db):
@@ -26,37 +234,44 @@ async def run_parallel_extraction(db):
     # 1. Fetch data
     start_fetch = time.time()
     all_posts = await fetch_all_posts(db)
-    batch_size = 25
+    _minify_posts(all_posts)
     
-    # 2. Create batches
-    batches = [all_posts[i:i + batch_size] for i in range(0, len(all_posts), batch_size)]
+    # 2. Serve repeated texts from the cache and batch only the rest
+    cached_extractions, to_extract, posts_by_hash = await _split_cached_posts(db, all_posts)
+    hash_by_post_id = {post["id"]: _post_hash(post) for post in to_extract}
+    cache_rows: List[tuple] = []
+    batches = _pack_batches(to_extract)
 
     # 3. Execute all batches concurrently
-    tasks = [get_llm_triplets_async(batch) for batch in batches]
-    results = await asyncio.gather(*tasks)
+    tasks = [_extract_batch(batch) for batch in batches]
 
-    # 4. Flatten and process results
-    all_extractions: List[PostAnalysis] = []
-    for batch_result in results:
-        all_extractions.extend(batch_result.results)
-    
-    # 5. Collect all unique canonical names from triplets
+    # 4-5. Flatten results as each batch lands; once enough new canonical names pile up,
+    # resolve them in the background so resolution overlaps the remaining extraction
+    all_extractions: List[PostAnalysis] = list(cached_extractions)
     canonical_names_set: set[str] = set()
-    for extraction in all_extractions:
-        for triplet in extraction.triplets:
-            canonical_names_set.add(triplet.subject.canonical_name)
-            canonical_names_set.add(triplet.object.canonical_name)
-    
-    canonical_names_list = list(canonical_names_set)
+    pending_names: set[str] = _collect_canonical_names(cached_extractions, canonical_names_set)
+    resolve_tasks: List[asyncio.Task] = []
+    for coro in asyncio.as_completed(tasks):
+        batch_result = await coro
+        results = _expand_batch_results(batch_result.results, hash_by_post_id, posts_by_hash, cache_rows)
+        all_extractions.extend(results)
+        pending_names |= _collect_canonical_names(results, canonical_names_set)
+        if len(pending_names) >= RESOLVE_CHUNK_SIZE:
+            resolve_tasks.append(asyncio.create_task(resolve_entity_names_async(list(pending_names))))
+            pending_names = set()
+        if len(cache_rows) >= CACHE_FLUSH_ROWS:
+            await _flush_cache_rows(db, cache_rows)
     
-    # 6. Resolve entity names using LLM
-    name_mapping = await resolve_entity_names_async(canonical_names_list)
+    # 6. Resolve the remaining entity names using LLM and merge the partial mappings
+    if pending_names:
+        resolve_tasks.append(asyncio.create_task(resolve_entity_names_async(list(pending_names))))
+    name_mapping = await _gather_name_mappings(resolve_tasks)
     
     # 7. Format results with resolved canonical names
     resolved_extractions = format_resolved_extractions(all_extractions, name_mapping)
     
-    # 8. Persist triplets to SQLite
-    await persist_triplets_to_db(db, resolved_extractions)
+    # 8. Persist triplets and newly cached analyses to SQLite
+    await persist_triplets_to_db(db, resolved_extractions, cache_rows)
     
     return resolved_extractions
 
@@ -77,10 +292,13 @@ async def parallel_extraction_stream(db):
     try:
         # 1. Fetch data
         all_posts = await fetch_all_posts(db)
-        batch_size = 25
+        _minify_posts(all_posts)
         
-        # 2. Create batches
-        batches = [all_posts[i:i + batch_size] for i in range(0, len(all_posts), batch_size)]
+        # 2. Serve repeated texts from the cache and batch only the rest
+        cached_extractions, to_extract, posts_by_hash = await _split_cached_posts(db, all_posts)
+        hash_by_post_id = {post["id"]: _post_hash(post) for post in to_extract}
+        cache_rows: List[tuple] = []
+        batches = _pack_batches(to_extract)
         # Count unique subreddits
         unique_subreddits = set(post["subreddit"] for post in all_posts)
         
@@ -95,13 +313,24 @@ async def parallel_extraction_stream(db):
         completed_batches = 0
         
         # Process batches in parallel but track completion
-        tasks = [get_llm_triplets_async(batch) for batch in batches]
+        tasks = [_extract_batch(batch) for batch in batches]
         
         # Use asyncio.as_completed to track progress
-        all_extractions: List[PostAnalysis] = []
+        # New canonical names are resolved in chunks in the background as batches land
+        all_extractions: List[PostAnalysis] = list(cached_extractions)
+        canonical_names_set: set[str] = set()
+        pending_names: set[str] = _collect_canonical_names(cached_extractions, canonical_names_set)
+        resolve_tasks: List[asyncio.Task] = []
         for coro in asyncio.as_completed(tasks):
             batch_result = await coro
-            all_extractions.extend(batch_result.results)
+            results = _expand_batch_results(batch_result.results, hash_by_post_id, posts_by_hash, cache_rows)
+            all_extractions.extend(results)
+            pending_names |= _collect_canonical_names(results, canonical_names_set)
+            if len(pending_names) >= RESOLVE_CHUNK_SIZE:
+                resolve_tasks.append(asyncio.create_task(resolve_entity_names_async(list(pending_names))))
+                pending_names = set()
+            if len(cache_rows) >= CACHE_FLUSH_ROWS:
+                await _flush_cache_rows(db, cache_rows)
             completed_batches += 1
             
             # Yield progress for each completed batch
@@ -118,17 +347,10 @@ async def parallel_extraction_stream(db):
             "message": "Building list of canonical entities"
         }
         
-        # 5. Collect all unique canonical names from triplets
-        canonical_names_set: set[str] = set()
-        for extraction in all_extractions:
-            for triplet in extraction.triplets:
-                canonical_names_set.add(triplet.subject.canonical_name)
-                canonical_names_set.add(triplet.object.canonical_name)
-        
-        canonical_names_list = list(canonical_names_set)
-        
-        # 6. Resolve entity names using LLM
-        name_mapping = await resolve_entity_names_async(canonical_names_list)
+        # 6. Resolve the remaining entity names using LLM and merge the partial mappings
+        if pending_names:
+            resolve_tasks.append(asyncio.create_task(resolve_entity_names_async(list(pending_names))))
+        name_mapping = await _gather_name_mappings(resolve_tasks)
         
         # 7. Format results with resolved canonical names
         resolved_extractions = format_resolved_extractions(all_extractions, name_mapping)
@@ -139,20 +361,25 @@ async def parallel_extraction_stream(db):
             "message": "Storing Entities & Relationships"
         }
         
-        # 8. Persist triplets to SQLite
-        await persist_triplets_to_db(db, resolved_extractions)
+        # 8. Persist triplets and newly cached analyses to SQLite
+        await persist_triplets_to_db(db, resolved_extractions, cache_rows)
         
-        # Write results to JSON file
-        with open("extraction_results.json", "w") as f:
-            json.dump([item.model_dump() for item in resolved_extractions], f, indent=2)
+        # Write results to JSON file; orjson encodes the dumped dicts natively, unindented
+        with open("extraction_results.json", "wb") as f:
+            f.write(orjson.dumps([item.model_dump() for item in resolved_extractions]))
         
     except Exception as e:
-        print(f"Error in parallel_extraction_stream: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error in parallel_extraction_stream")
         raise
 
 
+class _IdentityMapping(dict):
+    """Name mapping that resolves unmapped names to themselves with a single lookup."""
+
+    def __missing__(self, key):
+        return key
+
+
 def format_resolved_extractions(
     all_extractions: List[PostAnalysis],
     name_mapping: dict[str, str]
@@ -168,19 +395,21 @@ def format_resolved_extractions(
         List of resolved post analyses with normalized entity names
     """
     resolved_extractions: List[ResolvedPostAnalysis] = []
+    resolve = _IdentityMapping(name_mapping)
     
+    # Fields come from already-validated extractions, so model_construct skips re-validation
     for extraction in all_extractions:
         resolved_triplets: List[ResolvedTriplet] = []
         for triplet in extraction.triplets:
-            resolved_triplet = ResolvedTriplet(
-                subject=name_mapping.get(triplet.subject.canonical_name, triplet.subject.canonical_name),
+            resolved_triplet = ResolvedTriplet.model_construct(
+                subject=resolve[triplet.subject.canonical_name],
                 relationship=triplet.relationship,
-                object=name_mapping.get(triplet.object.canonical_name, triplet.object.canonical_name),
+                object=resolve[triplet.object.canonical_name],
                 evidence=triplet.evidence
             )
             resolved_triplets.append(resolved_triplet)
         
-        resolved_extraction = ResolvedPostAnalysis(
+        resolved_extraction = ResolvedPostAnalysis.model_construct(
             triplets=resolved_triplets,
             post_id=extraction.post_id,
             post_url=extraction.post_url,
@@ -191,16 +420,20 @@ def format_resolved_extractions(
     return resolved_extractions
 
 
-async def persist_triplets_to_db(db, resolved_extractions: List[ResolvedPostAnalysis]):
+async def persist_triplets_to_db(
+    db,
+    resolved_extractions: List[ResolvedPostAnalysis],
+    cache_rows: Optional[List[tuple]] = None,
+):
     """
     Persist resolved triplets to SQLite database.
     
     Args:
         db: Active database connection
         resolved_extractions: List of resolved post analyses containing triplets to persist.
+        cache_rows: (post_hash, json) rows of new LLM analyses, written to the
+            triplet cache in the same transaction
     """
-    await create_triplets_table(db)
-    
     # Prepare batch of triplets for insertion
     triplets_batch = []
     for extraction in resolved_extractions:
@@ -215,5 +448,11 @@ async def persist_triplets_to_db(db, resolved_extractions: List[ResolvedPostAnal
                 extraction.justification
             ))
     
-    if triplets_batch:
-        await insert_triplets_batch(db, triplets_batch)
+    # Table creation and every insert share one transaction and one commit
+    async with transaction(db):
+        await create_triplets_table(db)
+        if triplets_batch:
+            await insert_triplets_batch(db, triplets_batch)
+        if cache_rows:
+            await create_triplet_cache_table(db)
+            await insert_cached_analyses(db, cache_rows)
@@ -1,8 +1,13 @@
 from typing import List
+import asyncio
 import os
+import httpx
 import instructor
-import asyncio
+import logging
+import openai
 import time
+import weakref
+from functools import lru_cache
 
 from .models import (
     BatchExtraction,
@@ -10,7 +15,115 @@ from .models import (
     EntityResolutionResult,
 )
 from .prompts import TRIPLET_EXTRACTION_PROMPT, ENTITY_RESOLUTION_PROMPT
-from .text_processing import format_posts_for_llm, format_entity_names_for_resolution
+from .text_processing import format_posts_for_llm, format_entity_names_for_resolution, group_candidate_names
+
+log = logging.getLogger(__name__)
+
+
+_OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Names per entity-resolution call; small enough for the model to group reliably
+RESOLVE_SHARD_NAMES = 200
+
+# Keep enough idle connections for every concurrent extraction batch
+_LLM_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=40)
+
+
+def _extractor_model() -> str:
+    """Model used for both triplet extraction and entity resolution."""
+    return os.getenv("TRIPLET_EXTRACTOR_MODEL", "openrouter/google/gemini-2.0-flash-001")
+
+
+def _build_client(model: str, mode_name: str, async_client: bool):
+    """Build an instructor client for `model`, sync or async."""
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    mode = instructor.Mode[mode_name]
+    provider, _, model_name = model.partition("/")
+    if provider != "openrouter":
+        return instructor.from_provider(model, api_key=api_key, mode=mode, async_client=async_client)
+
+    # Built by hand (as from_provider does for OpenRouter) to size the httpx pool
+    if async_client:
+        client = openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=_OPENROUTER_BASE_URL,
+            http_client=openai.DefaultAsyncHttpxClient(limits=_LLM_HTTP_LIMITS),
+        )
+    else:
+        client = openai.OpenAI(
+            api_key=api_key,
+            base_url=_OPENROUTER_BASE_URL,
+            http_client=openai.DefaultHttpxClient(limits=_LLM_HTTP_LIMITS),
+        )
+    return instructor.from_openai(client, model=model_name, mode=mode)
+
+
+@lru_cache(maxsize=4)
+def _make_client(model: str, mode_name: str = "OPENROUTER_STRUCTURED_OUTPUTS"):
+    """
+    Build the sync instructor client for `model` once per (model, mode) and reuse it.
+    
+    Every call shares the client's connection pool, so batches reuse kept-alive
+    connections to OpenRouter instead of each paying a TLS handshake.
+    """
+    return _build_client(model, mode_name, async_client=False)
+
+
+# Async clients per event loop: their pooled connections belong to the loop that
+# opened them, so each asyncio.run gets its own client, dropped with its loop
+_async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _make_async_client(model: str, mode_name: str = "OPENROUTER_STRUCTURED_OUTPUTS"):
+    """
+    Return the async instructor client for `model` on the running event loop.
+    
+    Built once per (loop, model, mode), so concurrent batches share its connection
+    pool and await on the loop instead of each holding a worker thread.
+    """
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get((model, mode_name))
+    if client is None:
+        client = clients[(model, mode_name)] = _build_client(model, mode_name, async_client=True)
+    return client
+
+
+def _triplet_messages(posts: List[dict]) -> List[dict]:
+    """Build the chat messages for a triplet extraction request."""
+    formatted_posts = format_posts_for_llm(posts)
+    return [
+        {"role": "system", "content": TRIPLET_EXTRACTION_PROMPT},
+        {"role": "user", "content": f"Analyze these posts:\n\n{formatted_posts}"}
+    ]
+
+
+def _failed_extraction(posts: List[dict]) -> BatchExtraction:
+    """Placeholder results for a batch whose extraction failed."""
+    return BatchExtraction(results=[PostAnalysis(post_id=p['id'], has_business_info=False, justification="Error") for p in posts])
+
+
+def _resolution_messages(canonical_names: List[str]) -> List[dict]:
+    """Build the chat messages for an entity resolution request."""
+    return [
+        {"role": "system", "content": ENTITY_RESOLUTION_PROMPT},
+        {"role": "user", "content": format_entity_names_for_resolution(canonical_names)}
+    ]
+
+
+def _build_name_mapping(resolution_result: EntityResolutionResult, canonical_names: List[str]) -> dict[str, str]:
+    """Map every variant (and every ungrouped input name) to its master name."""
+    name_mapping: dict[str, str] = {}
+    for group in resolution_result.groups:
+        for variant in group.variants:
+            name_mapping[variant] = group.master_name
+        name_mapping[group.master_name] = group.master_name
+    
+    # For any names not in a group, map to themselves
+    for name in canonical_names:
+        if name not in name_mapping:
+            name_mapping[name] = name
+    
+    return name_mapping
 
 
 def get_llm_triplets(posts: List[dict]) -> BatchExtraction:
@@ -21,34 +134,62 @@ def get_llm_triplets(posts: List[dict]) -> BatchExtraction:
     if not posts:
         return BatchExtraction(results=[])
 
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    model = os.getenv("TRIPLET_EXTRACTOR_MODEL", "openrouter/google/gemini-2.0-flash-001")
-
-    formatted_posts = format_posts_for_llm(posts)
-
     try:
-        mode = instructor.Mode.OPENROUTER_STRUCTURED_OUTPUTS
-        client = instructor.from_provider(model, api_key=api_key, mode=mode)
-        
-        batch_results = client.create(
+        batch_results = _make_client(_extractor_model()).create(
             response_model=BatchExtraction,
-            messages=[
-                {"role": "system", "content": TRIPLET_EXTRACTION_PROMPT},
-                {"role": "user", "content": f"Analyze these posts:\n\n{formatted_posts}"}
-            ],
+            messages=_triplet_messages(posts),
             max_retries=2,
             max_tokens=16000
         )
         return batch_results
 
     except Exception as exc:
-        print(f"Failed to extract triplets: {exc}")
-        return BatchExtraction(results=[PostAnalysis(post_id=p['id'], has_business_info=False, justification="Error") for p in posts])
+        log.warning("Failed to extract triplets: %s", exc)
+        return _failed_extraction(posts)
 
 
 async def get_llm_triplets_async(posts: list[dict]) -> BatchExtraction:
-    """Async wrapper for get_llm_triplets."""
-    return await asyncio.to_thread(get_llm_triplets, posts)
+    """Async version of get_llm_triplets on the shared async instructor client."""
+    if not posts:
+        return BatchExtraction(results=[])
+
+    try:
+        return await _make_async_client(_extractor_model()).create(
+            response_model=BatchExtraction,
+            messages=_triplet_messages(posts),
+            max_retries=2,
+            max_tokens=16000
+        )
+
+    except Exception as exc:
+        log.warning("Failed to extract triplets: %s", exc)
+        return _failed_extraction(posts)
+
+
+def _pack_name_shards(groups: List[List[str]]) -> List[List[str]]:
+    """
+    Pack candidate groups into shards of at most RESOLVE_SHARD_NAMES names.
+    
+    Groups are kept whole where they fit; a group larger than a shard is sorted
+    (so near-identical spellings stay together) and split across shards.
+    """
+    shards: List[List[str]] = []
+    shard: List[str] = []
+    for group in groups:
+        if len(group) > RESOLVE_SHARD_NAMES:
+            group = sorted(group, key=str.lower)
+            shards.extend(
+                group[start:start + RESOLVE_SHARD_NAMES]
+                for start in range(0, len(group), RESOLVE_SHARD_NAMES)
+            )
+            continue
+        if shard and len(shard) + len(group) > RESOLVE_SHARD_NAMES:
+            shards.append(shard)
+            shard = []
+        shard.extend(group)
+    if shard:
+        shards.append(shard)
+    return shards
 
 
 def resolve_entity_names(canonical_names: List[str]) -> dict[str, str]:
@@ -56,6 +197,11 @@ def resolve_entity_names(canonical_names: List[str]) -> dict[str, str]:
     Given a list of canonical names, uses LLM to group entities that refer to the same 
     real-world entity and returns a mapping from each variant to its master name.
     
+    Names are grouped by shared lexical keys (see `group_candidate_names`) and the
+    groups packed whole into shards of at most RESOLVE_SHARD_NAMES names, one LLM
+    call each. Names with no lexical match are packed too, since aliases such as
+    'Facebook' / 'Meta' share no key and only the LLM can merge them.
+    
     Args:
         canonical_names: List of canonical entity names to resolve.
         
@@ -65,44 +211,55 @@ def resolve_entity_names(canonical_names: List[str]) -> dict[str, str]:
     if not canonical_names:
         return {}
 
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    model = os.getenv("TRIPLET_EXTRACTOR_MODEL", "openrouter/google/gemini-2.0-flash-001")
+    name_mapping: dict[str, str] = {}
+    for shard in _pack_name_shards(group_candidate_names(canonical_names)):
+        name_mapping.update(_resolve_shard(shard))
+    return name_mapping
 
-    user_prompt = format_entity_names_for_resolution(canonical_names)
 
+def _resolve_shard(names: List[str]) -> dict[str, str]:
+    """Resolve one shard of candidate names with a single LLM call."""
     try:
-        mode = instructor.Mode.OPENROUTER_STRUCTURED_OUTPUTS
-        client = instructor.from_provider(model, api_key=api_key, mode=mode)
-        
-        resolution_result = client.create(
+        resolution_result = _make_client(_extractor_model()).create(
             response_model=EntityResolutionResult,
-            messages=[
-                {"role": "system", "content": ENTITY_RESOLUTION_PROMPT},
-                {"role": "user", "content": user_prompt}
-            ],
+            messages=_resolution_messages(names),
             max_retries=2,
             max_tokens=8000
         )
-        
-        # Build mapping from variant to master name
-        name_mapping: dict[str, str] = {}
-        for group in resolution_result.groups:
-            for variant in group.variants:
-                name_mapping[variant] = group.master_name
-            name_mapping[group.master_name] = group.master_name
-        
-        # For any names not in a group, map to themselves
-        for name in canonical_names:
-            if name not in name_mapping:
-                name_mapping[name] = name
-        
-        return name_mapping
+        return _build_name_mapping(resolution_result, names)
 
     except Exception as exc:
-        print(f"Failed to resolve entity names: {exc}")
-        return {name: name for name in canonical_names}
+        log.warning("Failed to resolve entity names: %s", exc)
+        return {name: name for name in names}
+
+
+async def _resolve_shard_async(names: List[str]) -> dict[str, str]:
+    """Resolve one shard of candidate names with a single LLM call."""
+    try:
+        resolution_result = await _make_async_client(_extractor_model()).create(
+            response_model=EntityResolutionResult,
+            messages=_resolution_messages(names),
+            max_retries=2,
+            max_tokens=8000
+        )
+        return _build_name_mapping(resolution_result, names)
+
+    except Exception as exc:
+        log.warning("Failed to resolve entity names: %s", exc)
+        return {name: name for name in names}
 
 
 async def resolve_entity_names_async(canonical_names: List[str]) -> dict[str, str]:
-    """Async wrapper for resolve_entity_names."""
-    return await asyncio.to_thread(resolve_entity_names, canonical_names)
+    """
+    Async version of resolve_entity_names on the shared async instructor client.
+    
+    Candidate groups are packed into shards that are resolved concurrently.
+    """
+    if not canonical_names:
+        return {}
+
+    name_mapping: dict[str, str] = {}
+    shards = _pack_name_shards(group_candidate_names(canonical_names))
+    for partial in await asyncio.gather(*(_resolve_shard_async(shard) for shard in shards)):
+        name_mapping.update(partial)
+    return name_mapping
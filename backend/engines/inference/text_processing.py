@@ -1,38 +1,98 @@
 import re
+from collections import Counter
 from typing import List
+from xml.sax.saxutils import escape, quoteattr
 
 
 def format_posts_for_llm(posts: list) -> str:
-    """Format a list of posts into XML-like structure for LLM processing."""
-    batch_str = "<batch>\n"
+    """
+    Format a list of posts into XML-like structure for LLM processing.
     
-    for p in posts:
-        clean_content = minify_text(p['text'])
-        
-        batch_str += (
-            f'  <post id="{p["id"]}">\n'
-            f'    <url>{p["url"]}</url>\n'
-            f'    <content>{clean_content}</content>\n'
-            f'  </post>\n'
-        )
-        
-    batch_str += "</batch>"
-    return batch_str
+    Post text is used as given; the extraction pipeline minifies it once up front,
+    before batch sizing.
+    """
+    # Escaped so a post quoting '</content>' or '</post>' can't break the batch structure;
+    # one join instead of re-copying the growing string on every +=
+    return "<batch>\n" + "".join(
+        f'  <post id={quoteattr(str(p["id"]))} url={quoteattr(p["url"] or "")}>\n'
+        f'    <content>{escape(p["text"])}</content>\n'
+        f'  </post>\n'
+        for p in posts
+    ) + "</batch>"
 
 
 def format_entity_names_for_resolution(canonical_names: List[str]) -> str:
     """Format a list of entity names into XML-like structure for entity resolution."""
-    prompt_str = (
+    return (
         "Here is a list of unique entity names extracted from news logs. "
         "Group those that refer to the same real-world entity and provide a single master name for each group.\n\n"
         "<entities>\n"
+        + "".join(f"  <entity>{name}</entity>\n" for name in canonical_names)
+        + "</entities>"
     )
+
+
+_NAME_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Tokens too generic to suggest two names are the same entity
+_NAME_STOPWORDS = frozenset({
+    "the", "and", "for", "inc", "corp", "corporation", "company", "llc", "ltd",
+    "group", "holdings", "technologies", "labs", "university",
+})
+
+
+# A token shared by more names than this is too common to link them (first names,
+# words like 'capital' or 'health'), or it would chain unrelated names together
+_MAX_TOKEN_NAMES = 3
+
+
+def group_candidate_names(names: List[str]) -> List[List[str]]:
+    """
+    Group names that could refer to the same entity by shared lexical keys.
     
-    for name in canonical_names:
-        prompt_str += f"  <entity>{name}</entity>\n"
-    
-    prompt_str += "</entities>"
-    return prompt_str
+    Names are linked when they share their alphanumeric-only form ('Open AI' /
+    'OpenAI'), when one's acronym is the other's full form ('GM' / 'General Motors'),
+    or when they share a significant token used by at most _MAX_TOKEN_NAMES names
+    ('Altman' / 'Sam Altman'). Groups are the connected components, so names in
+    different groups never need to be compared.
+    """
+    tokenized = [_NAME_TOKEN_RE.findall(name.lower()) for name in names]
+    significant = [[t for t in tokens if len(t) >= 3 and t not in _NAME_STOPWORDS] for tokens in tokenized]
+    token_names = Counter(token for tokens in significant for token in set(tokens))
+
+    parent = list(range(len(names)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int) -> None:
+        parent[find(i)] = find(j)
+
+    first_with_key: dict[str, int] = {}
+    first_with_form: dict[str, int] = {}
+    for i, tokens in enumerate(tokenized):
+        form = "".join(tokens)
+        if form:
+            union(i, first_with_form.setdefault(form, i))
+        keys = {form, *(t for t in significant[i] if token_names[t] <= _MAX_TOKEN_NAMES)}
+        for key in keys:
+            if key:
+                union(i, first_with_key.setdefault(key, i))
+
+    # Acronyms only link to a name spelled exactly that way, never to each other
+    for i, tokens in enumerate(significant):
+        if len(tokens) >= 2:
+            j = first_with_form.get("".join(t[0] for t in tokens))
+            if j is not None:
+                union(i, j)
+
+    groups: dict[int, List[str]] = {}
+    for i, name in enumerate(names):
+        groups.setdefault(find(i), []).append(name)
+    return list(groups.values())
 
 
 def minify_text(text: str) -> str:
@@ -40,10 +100,8 @@ def minify_text(text: str) -> str:
     if not text:
         return ""
     
-    # 1. Remove Emojis (removes all non-BMP characters)
+    # 1. Remove Emojis (drops every non-ASCII character in one C-level codec pass)
     text = text.encode('ascii', 'ignore').decode('ascii')
     
-    # 2. Normalize Whitespace & Newlines
-    text = re.sub(r'\s+', ' ', text)
-    
-    return text.strip()
+    # 2. Normalize Whitespace & Newlines (split() also drops leading/trailing runs)
+    return ' '.join(text.split())
@@ -0,0 +1,67 @@
+"""Async request pacing shared by the engines."""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token bucket that refills `rate` tokens per second, holding at most `burst`.
+
+    Each `acquire()` (or `async with bucket:`) takes one token, waiting just long enough
+    for one to refill when the bucket is empty. `update_from_headers` lets a server's
+    reported budget slow the bucket below its configured rate.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.max_rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """Credit the tokens earned since the last refill at the current rate."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Take one token, sleeping until one is available."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def update_from_headers(self, headers):
+        """
+        Pace to Reddit's reported budget from `x-ratelimit-remaining` / `x-ratelimit-reset`.
+
+        The requests left in the window are spread evenly over the seconds until it
+        resets, never faster than the configured rate. Missing or malformed headers
+        leave the bucket unchanged.
+        """
+        try:
+            remaining = float(headers.get("x-ratelimit-remaining"))
+            reset = float(headers.get("x-ratelimit-reset"))
+        except (TypeError, ValueError):
+            return
+        if reset <= 0:
+            return
+        self._refill()
+        self._tokens = min(self._tokens, remaining)
+        self.rate = min(self.max_rate, max(remaining, 1) / reset)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+__all__ = ["TokenBucket"]
@@ -0,0 +1,44 @@
+"""SQLite write helpers shared by the engines' database modules."""
+
+from contextlib import asynccontextmanager
+from itertools import chain
+
+# Conservative bound-parameter limit (SQLITE_MAX_VARIABLE_NUMBER on older builds)
+SQLITE_MAX_VARIABLES = 999
+
+
+@asynccontextmanager
+async def transaction(db):
+    """Run the enclosed writes in a single transaction, rolling back on error."""
+    await db.execute("BEGIN")
+    try:
+        yield db
+    except BaseException:
+        await db.rollback()
+        raise
+    else:
+        await db.commit()
+
+
+async def insert_many(db, insert_sql, ncols, rows):
+    """Insert rows using multi-row VALUES statements, chunked to stay under SQLite's bound-parameter limit.
+
+    Args:
+        db: Database connection
+        insert_sql: The statement up to (not including) VALUES, e.g. "INSERT INTO t (a, b)"
+        ncols: Number of columns per row
+        rows: Iterable of row tuples
+    """
+    rows = list(rows)
+    chunk_size = SQLITE_MAX_VARIABLES // ncols
+    row_placeholders = "(" + ",".join("?" * ncols) + ")"
+    full_chunk_sql = f"{insert_sql} VALUES " + ",".join([row_placeholders] * chunk_size)
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        sql = full_chunk_sql if len(chunk) == chunk_size else (
+            f"{insert_sql} VALUES " + ",".join([row_placeholders] * len(chunk))
+        )
+        await db.execute(sql, list(chain.from_iterable(chunk)))
+
+
+__all__ = ["SQLITE_MAX_VARIABLES", "transaction", "insert_many"]
@@ -0,0 +1,40 @@
+"""Tests for the pooled report-database connections used by the API."""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from database import close_db_connections, get_db_connection
+
+REPORT_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "reports", "tesla.db")
+
+
+def _md5(path):
+    with open(path, "rb") as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+def test_report_connections_are_read_only_and_leave_the_file_untouched(tmp_path):
+    db_path = str(tmp_path / "tesla.db")
+    shutil.copy(REPORT_DB, db_path)
+    before = _md5(db_path)
+
+    async def run():
+        try:
+            for _ in range(2):
+                async with get_db_connection(db_path) as db:
+                    cursor = await db.execute("SELECT count(*) FROM subreddits")
+                    assert (await cursor.fetchone())[0] > 0
+                    with pytest.raises(sqlite3.OperationalError):
+                        await db.execute("DELETE FROM subreddits")
+        finally:
+            await close_db_connections()
+
+    asyncio.run(run())
+
+    assert _md5(db_path) == before
+    assert sorted(os.listdir(tmp_path)) == ["tesla.db"]
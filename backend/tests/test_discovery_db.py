@@ -0,0 +1,138 @@
+"""Tests for the discovery database's in-memory load and migration to disk."""
+
+import asyncio
+
+import aiosqlite
+
+from engines.discovery.db import (
+    create_subreddits_indexes,
+    init_subreddits_db,
+    insert_posts,
+    insert_subreddits,
+    migrate_to_disk,
+    select_posts_after,
+    transaction,
+)
+from engines.inference.db import (
+    create_triplet_cache_table,
+    create_triplets_table,
+    fetch_cached_analyses,
+    insert_cached_analyses,
+)
+
+
+async def _load(subreddit: str):
+    db = await init_subreddits_db()
+    async with transaction(db):
+        await insert_subreddits(db, [(subreddit, 1.0, 0.5, 2.0, None)])
+        await insert_posts(db, [(subreddit, "title", "body", 3, 1, 1714564800, "https://x", f"{subreddit}-p1")])
+    await create_subreddits_indexes(db)
+    return db
+
+
+def test_migrate_to_disk_twice_while_earlier_connections_stay_open(tmp_path):
+    db_path = str(tmp_path / "subreddits.db")
+
+    async def run():
+        still_open = []
+        try:
+            for subreddit in ("r/first", "r/second", "r/third"):
+                # Like the analysis router, the previous run's disk connection is never closed,
+                # and a pooled reader keeps the file open too
+                disk_db = await migrate_to_disk(await _load(subreddit), db_path)
+                reader = await aiosqlite.connect(db_path)
+                still_open += [disk_db, reader]
+
+                cursor = await reader.execute("SELECT subreddit_name FROM subreddits")
+                assert await cursor.fetchall() == [(subreddit,)]
+                cursor = await disk_db.execute("SELECT pid FROM posts")
+                assert await cursor.fetchall() == [(f"{subreddit}-p1",)]
+        finally:
+            for conn in still_open:
+                await conn.close()
+
+    asyncio.run(run())
+
+
+def test_migrate_to_disk_copies_indexes(tmp_path):
+    db_path = str(tmp_path / "subreddits.db")
+
+    async def run():
+        disk_db = await migrate_to_disk(await _load("r/only"), db_path)
+        try:
+            cursor = await disk_db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+            )
+            disk_indexes = {name for (name,) in await cursor.fetchall()}
+        finally:
+            await disk_db.close()
+
+        memory_db = await _load("r/only")
+        try:
+            cursor = await memory_db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+            )
+            memory_indexes = {name for (name,) in await cursor.fetchall()}
+        finally:
+            await memory_db.close()
+        return disk_indexes, memory_indexes
+
+    disk_indexes, memory_indexes = asyncio.run(run())
+    assert memory_indexes
+    assert disk_indexes == memory_indexes
+
+
+def test_triplet_cache_survives_the_next_migration(tmp_path):
+    db_path = str(tmp_path / "subreddits.db")
+
+    async def run():
+        disk_db = await migrate_to_disk(await _load("r/first"), db_path)
+        try:
+            async with transaction(disk_db):
+                await create_triplets_table(disk_db)
+                await create_triplet_cache_table(disk_db)
+                await insert_cached_analyses(disk_db, [(b"hash", b"{}")])
+        finally:
+            await disk_db.close()
+
+        disk_db = await migrate_to_disk(await _load("r/second"), db_path)
+        try:
+            cursor = await disk_db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            tables = {name for (name,) in await cursor.fetchall()}
+            return tables, await fetch_cached_analyses(disk_db, [b"hash"])
+        finally:
+            await disk_db.close()
+
+    tables, cached = asyncio.run(run())
+    # The previous run's triplets are replaced; its cached analyses are kept
+    assert "triplets" not in tables
+    assert cached == {b"hash": b"{}"}
+
+
+def test_select_posts_after_pages_through_every_post_once():
+    async def run():
+        db = await init_subreddits_db()
+        try:
+            async with transaction(db):
+                await insert_posts(db, [
+                    (subreddit, "title", "body", 1, 0, 0, "https://x", pid)
+                    for subreddit in ("r/b", "r/a", "r/c")
+                    for pid in ("p2", "p10", "p1")
+                ])
+
+            pages = []
+            last = ("", "")
+            while page := await select_posts_after(db, *last, limit=4):
+                pages.append([(row[0], row[-1]) for row in page])
+                last = (page[-1][0], page[-1][-1])
+            return pages
+        finally:
+            await db.close()
+
+    pages = asyncio.run(run())
+
+    assert [len(page) for page in pages] == [4, 4, 1]
+    # Key order across pages, with the same pid in different subreddits kept apart
+    assert [key for page in pages for key in page] == sorted(
+        (subreddit, pid) for subreddit in ("r/a", "r/b", "r/c") for pid in ("p1", "p10", "p2")
+    )
@@ -0,0 +1,78 @@
+"""Tests for the lexical pre-clustering in front of entity resolution."""
+
+import asyncio
+
+from engines.inference import llm_client
+from engines.inference.llm_client import RESOLVE_SHARD_NAMES, _pack_name_shards, resolve_entity_names_async
+from engines.inference.text_processing import group_candidate_names
+
+FIRST_NAMES = ["James", "Mary", "John", "Linda", "Michael", "Sarah", "David", "Laura", "Robert", "Emma"]
+LAST_NAMES = ["Smith", "Jones", "Brown", "Taylor", "Wilson", "Davies", "Evans", "Thomas", "Roberts", "Walker"]
+ORG_PREFIXES = [
+    "Apex", "Summit", "Blue", "Northern", "Pacific", "Atlas", "Vertex", "Silver",
+    "Harbor", "Pioneer", "Golden", "Crescent", "Liberty", "Sterling", "Evergreen",
+]
+ORG_SUFFIXES = [
+    "Capital", "Health", "Partners", "Ventures", "Systems", "Energy", "Media", "Bank",
+    "Foods", "Logistics", "Robotics", "Networks", "Pharma", "Motors", "Analytics",
+]
+
+
+def _realistic_names():
+    people = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    orgs = [f"{prefix} {suffix}" for prefix in ORG_PREFIXES for suffix in ORG_SUFFIXES]
+    return people + orgs
+
+
+def test_common_tokens_do_not_chain_unrelated_names():
+    names = _realistic_names()
+    groups = group_candidate_names(names)
+
+    assert len(names) == 325
+    assert sorted(name for group in groups for name in group) == sorted(names)
+    assert max(len(group) for group in groups) <= 3
+
+
+def test_variants_are_still_grouped():
+    names = ["OpenAI", "Open AI", "Sam Altman", "Altman", "GM", "General Motors", "Tesla"]
+    groups = {frozenset(group) for group in group_candidate_names(names)}
+
+    assert frozenset({"OpenAI", "Open AI"}) in groups
+    assert frozenset({"Sam Altman", "Altman"}) in groups
+    assert frozenset({"GM", "General Motors"}) in groups
+    assert frozenset({"Tesla"}) in groups
+
+
+def test_acronyms_do_not_link_to_each_other():
+    groups = group_candidate_names(["James Smith", "John Stone"])
+
+    assert sorted(map(len, groups)) == [1, 1]
+
+
+def test_oversized_groups_are_split_across_shards():
+    big_group = [f"Name {i}" for i in range(RESOLVE_SHARD_NAMES * 2 + 5)]
+    shards = _pack_name_shards([["A", "B"], big_group, ["C", "D"]])
+
+    assert all(len(shard) <= RESOLVE_SHARD_NAMES for shard in shards)
+    assert sorted(name for shard in shards for name in shard) == sorted(["A", "B", "C", "D", *big_group])
+    # Small groups are never split
+    assert any({"A", "B"} <= set(shard) for shard in shards)
+    assert any({"C", "D"} <= set(shard) for shard in shards)
+
+
+def test_names_without_a_lexical_match_still_reach_the_llm(monkeypatch):
+    shards = []
+
+    async def fake_resolve_shard(names):
+        shards.append(names)
+        return {name: "Meta" if name == "Facebook" else name for name in names}
+
+    monkeypatch.setattr(llm_client, "_resolve_shard_async", fake_resolve_shard)
+    names = ["Facebook", "Meta", "OpenAI", "Open AI", "Google", "Alphabet"]
+    mapping = asyncio.run(resolve_entity_names_async(names))
+
+    # Aliases sharing no key are sent together, so the LLM can still merge them
+    assert sorted(name for shard in shards for name in shard) == sorted(names)
+    assert any({"Facebook", "Meta", "Google", "Alphabet"} <= set(shard) for shard in shards)
+    assert mapping["Facebook"] == "Meta"
+    assert set(mapping) == set(names)
@@ -0,0 +1,142 @@
+"""Tests for extraction batching, missing-id re-queueing, name-resolution merging and the triplet cache."""
+
+import asyncio
+
+import aiosqlite
+
+from engines.inference import extraction
+from engines.inference.db import create_triplets_table, fetch_cached_analyses
+from engines.inference.extraction import (
+    MAX_BATCH_POSTS,
+    _expand_batch_results,
+    _extract_batch,
+    _gather_name_mappings,
+    _pack_batches,
+    _post_hash,
+    _split_cached_posts,
+    persist_triplets_to_db,
+)
+from engines.inference.models import BatchExtraction, PostAnalysis
+
+
+def _post(pid: str, text: str = "some text") -> dict:
+    return {"id": pid, "subreddit": "r/test", "text": text, "url": f"https://reddit.com/{pid}"}
+
+
+def _analysis(pid: str, justification: str = "ok") -> PostAnalysis:
+    return PostAnalysis(post_id=pid, has_business_info=False, justification=justification)
+
+
+def test_pack_batches_respects_token_budget():
+    # 400 characters is about 101 estimated tokens per post
+    posts = [_post(str(i), "x" * 400) for i in range(10)]
+    batches = _pack_batches(posts, max_tokens=250)
+
+    assert [len(batch) for batch in batches] == [2, 2, 2, 2, 2]
+    assert [post for batch in batches for post in batch] == posts
+
+
+def test_pack_batches_respects_post_cap():
+    posts = [_post(str(i), "x") for i in range(MAX_BATCH_POSTS * 2 + 1)]
+    batches = _pack_batches(posts)
+
+    assert [len(batch) for batch in batches] == [MAX_BATCH_POSTS, MAX_BATCH_POSTS, 1]
+
+
+def test_pack_batches_keeps_an_oversized_post_on_its_own():
+    posts = [_post("small", "x"), _post("huge", "x" * 10_000), _post("after", "x")]
+    batches = _pack_batches(posts, max_tokens=100)
+
+    assert [[post["id"] for post in batch] for batch in batches] == [["small"], ["huge"], ["after"]]
+
+
+def test_extract_batch_requeues_missing_and_drops_unknown_ids(monkeypatch):
+    calls = []
+
+    async def fake_llm(posts):
+        ids = [post["id"] for post in posts]
+        calls.append(ids)
+        if len(calls) == 1:
+            # Skips "b", repeats "a" and invents "zzz"
+            return BatchExtraction(results=[_analysis("a"), _analysis("a", "dup"), _analysis("zzz"), _analysis("c")])
+        return BatchExtraction(results=[_analysis(pid) for pid in ids])
+
+    monkeypatch.setattr(extraction, "get_llm_triplets_async", fake_llm)
+    result = asyncio.run(_extract_batch([_post("a"), _post("b"), _post("c")]))
+
+    assert calls == [["a", "b", "c"], ["b"]]
+    assert sorted(analysis.post_id for analysis in result.results) == ["a", "b", "c"]
+    assert next(a for a in result.results if a.post_id == "a").justification == "ok"
+
+
+
+def test_extract_batch_runs_under_repeated_asyncio_run(monkeypatch):
+    async def fake_llm(posts):
+        await asyncio.sleep(0)
+        return BatchExtraction(results=[_analysis(post["id"]) for post in posts])
+
+    monkeypatch.setattr(extraction, "get_llm_triplets_async", fake_llm)
+    monkeypatch.setattr(extraction, "_LLM_CONCURRENCY", 1)
+    monkeypatch.setattr(extraction, "_LLM_RATE", 1000.0)
+
+    async def run():
+        # More batches than slots, so the semaphore and bucket are waited on
+        return await asyncio.gather(*(_extract_batch([_post(str(i))]) for i in range(3)))
+
+    for _ in range(2):
+        assert len(asyncio.run(run())) == 3
+
+def test_triplet_cache_round_trip():
+    async def run():
+        async with aiosqlite.connect(":memory:") as db:
+            await create_triplets_table(db)
+            posts = [_post("a", "same text"), _post("b", "same text"), _post("c", "other text")]
+
+            cached, to_extract, posts_by_hash = await _split_cached_posts(db, posts)
+            assert cached == []
+            # Identical texts are extracted once
+            assert [post["id"] for post in to_extract] == ["a", "c"]
+
+            cache_rows = []
+            hash_by_post_id = {post["id"]: _post_hash(post) for post in to_extract}
+            results = _expand_batch_results(
+                [_analysis("a"), _analysis("c", "Error")], hash_by_post_id, posts_by_hash, cache_rows
+            )
+            # "b" gets a copy of "a"'s analysis; the failed "c" is not cached
+            assert sorted(analysis.post_id for analysis in results) == ["a", "b", "c"]
+            assert [row[0] for row in cache_rows] == [_post_hash(posts[0])]
+
+            await persist_triplets_to_db(db, [], cache_rows)
+            stored = await fetch_cached_analyses(db, [_post_hash(posts[0]), _post_hash(posts[2])])
+            assert list(stored) == [_post_hash(posts[0])]
+
+            cached, to_extract, _ = await _split_cached_posts(db, posts)
+            assert sorted((a.post_id, a.post_url) for a in cached) == [
+                ("a", "https://reddit.com/a"),
+                ("b", "https://reddit.com/b"),
+            ]
+            assert [post["id"] for post in to_extract] == ["c"]
+
+    asyncio.run(run())
+
+
+def test_gather_name_mappings_merges_variants_across_chunks(monkeypatch):
+    aliases = {"OpenAI Inc": "OpenAI", "Open AI": "OpenAI"}
+
+    async def fake_resolve(names):
+        return {name: aliases.get(name, name) for name in names}
+
+    monkeypatch.setattr(extraction, "resolve_entity_names_async", fake_resolve)
+
+    async def run():
+        # Each chunk keeps its own spelling as master, as when the variants never meet
+        chunks = [["OpenAI Inc", "Tesla"], ["Open AI", "Nvidia"]]
+        tasks = [asyncio.create_task(asyncio.sleep(0, {name: name for name in chunk})) for chunk in chunks]
+        return await _gather_name_mappings(tasks)
+
+    assert asyncio.run(run()) == {
+        "OpenAI Inc": "OpenAI",
+        "Open AI": "OpenAI",
+        "Tesla": "Tesla",
+        "Nvidia": "Nvidia",
+    }
@@ -0,0 +1,69 @@
+"""Tests for Google Custom Search paging and its retry handling."""
+
+import httpx
+
+from engines.discovery import core
+from engines.discovery.core import _get_google_page
+
+
+class _FakeClient:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, params=None):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+def _fetch(monkeypatch, *responses, **kwargs):
+    client = _FakeClient(responses)
+    sleeps = []
+    monkeypatch.setattr(core, "get_sync_http_client", lambda: client)
+    monkeypatch.setattr(core.time, "sleep", sleeps.append)
+    return _get_google_page({"q": "python"}, **kwargs), client.calls, sleeps
+
+
+def test_rate_limits_back_off_exponentially_then_succeed(monkeypatch):
+    response, calls, sleeps = _fetch(monkeypatch, httpx.Response(429), httpx.Response(429), httpx.Response(200))
+
+    assert response.status_code == 200
+    assert calls == 3
+    assert sleeps == [1, 2]
+
+
+def test_retry_after_is_honoured_but_capped(monkeypatch):
+    response, _, sleeps = _fetch(
+        monkeypatch,
+        httpx.Response(429, headers={"Retry-After": "3"}),
+        httpx.Response(429, headers={"Retry-After": "86400"}),
+        httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}),
+        httpx.Response(200),
+    )
+
+    assert response.status_code == 200
+    assert sleeps == [3.0, 8.0, 4]
+
+
+def test_rate_limit_retries_are_bounded(monkeypatch):
+    response, calls, sleeps = _fetch(monkeypatch, *[httpx.Response(429)] * 3, max_rate_limit_retries=2)
+
+    assert response is None
+    assert calls == 3
+    assert len(sleeps) == 2
+
+
+def test_server_errors_are_retried_once_after_a_pause(monkeypatch):
+    response, calls, sleeps = _fetch(monkeypatch, httpx.Response(503), httpx.Response(502))
+
+    assert response is None
+    assert calls == 2
+    assert sleeps == [1]
+
+
+def test_client_errors_stop_paging_without_a_retry(monkeypatch):
+    response, calls, sleeps = _fetch(monkeypatch, httpx.Response(403))
+
+    assert response is None
+    assert calls == 1
+    assert sleeps == []
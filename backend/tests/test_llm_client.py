@@ -0,0 +1,26 @@
+"""Tests for the LLM clients shared across extraction calls."""
+
+import asyncio
+
+from engines.inference.llm_client import _make_async_client, _make_client
+
+
+def test_async_client_is_shared_within_a_loop_and_rebuilt_per_loop(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    model = "openrouter/google/gemini-2.0-flash-001"
+
+    async def clients():
+        return _make_async_client(model), _make_async_client(model)
+
+    first, again = asyncio.run(clients())
+    second, _ = asyncio.run(clients())
+
+    assert first is again
+    assert second is not first
+
+
+def test_sync_client_is_built_once(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    model = "openrouter/google/gemini-2.0-flash-001"
+
+    assert _make_client(model) is _make_client(model)
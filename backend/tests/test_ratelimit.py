@@ -0,0 +1,66 @@
+"""Tests for the shared async token bucket."""
+
+import asyncio
+import time
+
+from engines.ratelimit import TokenBucket
+
+
+def test_burst_is_immediate_then_paced_at_rate():
+    async def run():
+        bucket = TokenBucket(rate=20.0, burst=3)
+        start = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+        burst_elapsed = time.monotonic() - start
+        for _ in range(2):
+            await bucket.acquire()
+        return burst_elapsed, time.monotonic() - start
+
+    burst_elapsed, total_elapsed = asyncio.run(run())
+
+    assert burst_elapsed < 0.05
+    # Two more tokens at 20/s take about 0.1s
+    assert 0.08 <= total_elapsed < 0.5
+
+
+def test_context_manager_takes_a_token():
+    async def run():
+        bucket = TokenBucket(rate=1.0, burst=1)
+        async with bucket:
+            pass
+        return bucket._tokens
+
+    assert asyncio.run(run()) < 1
+
+
+def test_update_from_headers_slows_to_reported_budget():
+    bucket = TokenBucket(rate=1.0, burst=5)
+    bucket.update_from_headers({"x-ratelimit-remaining": "10", "x-ratelimit-reset": "100"})
+
+    assert bucket.rate == 0.1
+    assert bucket._tokens <= 5
+
+
+def test_update_from_headers_never_exceeds_configured_rate():
+    bucket = TokenBucket(rate=1.0, burst=5)
+    bucket.update_from_headers({"x-ratelimit-remaining": "600", "x-ratelimit-reset": "10"})
+
+    assert bucket.rate == 1.0
+
+
+def test_update_from_headers_caps_tokens_at_remaining():
+    bucket = TokenBucket(rate=1.0, burst=5)
+    bucket.update_from_headers({"x-ratelimit-remaining": "0", "x-ratelimit-reset": "30"})
+
+    assert bucket._tokens == 0
+    assert bucket.rate == 1 / 30
+
+
+def test_update_from_headers_ignores_missing_or_bad_values():
+    bucket = TokenBucket(rate=1.0, burst=5)
+    bucket.update_from_headers({})
+    bucket.update_from_headers({"x-ratelimit-remaining": "abc", "x-ratelimit-reset": "10"})
+    bucket.update_from_headers({"x-ratelimit-remaining": "5", "x-ratelimit-reset": "0"})
+
+    assert bucket.rate == 1.0
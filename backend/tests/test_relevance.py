@@ -0,0 +1,45 @@
+"""Tests for subreddit relevance scoring and ranking."""
+
+import pytest
+
+from engines.discovery.core import _compute_relevance_scores, _rank_subreddit_names
+
+
+def test_relevance_scores_are_max_scaled_and_weighted():
+    rows = [
+        # (subreddit, engagement, freshness, frequency)
+        ("r/a", 10.0, 0.5, 4),
+        ("r/b", 5.0, 1.0, 2),
+        ("r/rare", 100.0, 1.0, 1),
+    ]
+    scores = _compute_relevance_scores(rows, min_frequency=2)
+
+    # r/rare is below min_frequency: it is neither scored nor used for the maxima
+    assert set(scores) == {"r/a", "r/b"}
+    assert scores["r/a"] == pytest.approx((0.4 * 1 + 0.3 * 0.5 + 0.3 * 1) * 100)
+    assert scores["r/b"] == pytest.approx((0.4 * 0.5 + 0.3 * 1 + 0.3 * 0.5) * 100)
+
+
+def test_zero_maxima_normalize_to_zero():
+    scores = _compute_relevance_scores([("r/a", 0.0, 0.0, 3), ("r/b", 0.0, 0.0, 1)], min_frequency=1)
+
+    assert scores["r/a"] == pytest.approx(40.0)
+    assert scores["r/b"] == pytest.approx(0.4 / 3 * 100)
+
+
+def test_no_rows_meeting_min_frequency_gives_no_scores():
+    assert _compute_relevance_scores([("r/a", 1.0, 1.0, 1)], min_frequency=2) == {}
+
+
+def test_ranking_orders_by_score_with_unscored_last():
+    rows = [("r/unscored", 0, 0, 0), ("r/low", 0, 0, 0), ("r/high", 0, 0, 0), ("r/also_unscored", 0, 0, 0)]
+    scores = {"r/low": 10.0, "r/high": 90.0}
+
+    # Unscored rows keep their input order after the scored ones, as NULLs sorted last in SQL
+    assert _rank_subreddit_names(rows, scores) == ["r/high", "r/low", "r/unscored", "r/also_unscored"]
+
+
+def test_ranking_keeps_input_order_for_ties():
+    rows = [("r/b", 0, 0, 0), ("r/a", 0, 0, 0), ("r/c", 0, 0, 0)]
+
+    assert _rank_subreddit_names(rows, {"r/a": 5.0, "r/b": 5.0, "r/c": 7.0}) == ["r/c", "r/b", "r/a"]
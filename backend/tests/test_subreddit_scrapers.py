@@ -0,0 +1,84 @@
+"""Tests for the lxml parsers of old.reddit search pages."""
+
+from lxml import html
+
+from engines.discovery.subreddit_discovery import _subreddits_from_search_page
+from engines.discovery.subreddit_ranking import (
+    _parse_count,
+    scrape_subreddit_search_page,
+    scrape_subreddit_search_stream,
+)
+
+
+def _result(fullname, title, score, comments, when, body, subreddit="r/python"):
+    return f"""
+    <div class="search-result search-result-link" data-fullname="{fullname}">
+      <div>
+        <header class="search-result-header">
+          <a href="https://old.reddit.com/{fullname}" class="search-title">{title}</a>
+        </header>
+        <div class="search-result-meta">
+          <span class="search-score">{score}</span>
+          <a class="search-comments" href="#">{comments}</a>
+          <span class="search-time">submitted <time datetime="{when}">1 day ago</time></span>
+          <span class="search-author">to <a href="/{subreddit}">{subreddit}</a></span>
+          <span>in <a href="/{subreddit}/">{subreddit}</a></span>
+        </div>
+        <div class="search-expando">
+          <div class="search-result-body"><p>{body}</p><p>more</p></div>
+        </div>
+      </div>
+    </div>"""
+
+
+PAGE = f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>search</title></head><body>
+<div class="search-result-listing">
+  <div class="contents">
+    {_result("t3_a", "Learning <mark>Python</mark> fast", "1,243 points", "87 comments",
+             "2024-05-01T12:00:00+00:00", "Café &amp; code")}
+    {_result("t3_b", "Downvoted take", "-5 points", "1 comment", "2024-05-02T08:30:00Z", "meh")}
+    {_result("t3_c", "No metadata at all", "", "comment", "", "")}
+  </div>
+</div>
+<div class="search-result-listing">
+  <div class="contents">
+    {_result("t5_x", "Subreddit one", "", "", "", "", subreddit="r/learnpython")}
+    {_result("t5_y", "Subreddit two", "", "", "", "", subreddit="r/Python")}
+  </div>
+</div>
+</body></html>"""
+
+
+def test_parse_count():
+    assert _parse_count("1,243 points") == 1243
+    assert _parse_count("-5 points") == -5
+    assert _parse_count("comment") == 0
+    assert _parse_count("") == 0
+
+
+def test_stream_parser_matches_page_parser():
+    from_tree = scrape_subreddit_search_page(html.document_fromstring(PAGE))
+    from_stream = scrape_subreddit_search_stream(PAGE.encode("utf-8"), "utf-8")
+
+    assert from_stream == from_tree
+    assert [post.post_id for post in from_stream] == ["t3_a", "t3_b", "t3_c"]
+
+
+def test_stream_parser_extracts_fields():
+    first, downvoted, bare = scrape_subreddit_search_stream(PAGE.encode("utf-8"))
+
+    # Stripped text and <mark> parts are joined as-is, as the BeautifulSoup parser did
+    assert first.post_title == "LearningPythonfast"
+    assert first.post_url == "https://old.reddit.com/t3_a"
+    assert (first.ups, first.num_comments) == (1243, 87)
+    assert first.created_utc == 1714564800
+    assert first.self_text == "Café & code more"
+    assert (downvoted.ups, downvoted.num_comments) == (-5, 1)
+    assert (bare.ups, bare.num_comments, bare.created_utc) == (0, 0, 0)
+
+
+def test_discovery_reads_the_second_listing():
+    names = _subreddits_from_search_page(html.document_fromstring(PAGE))
+
+    assert sorted(names) == ["r/Python", "r/learnpython"]
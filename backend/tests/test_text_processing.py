@@ -0,0 +1,19 @@
+"""Tests for the XML-like prompt formatting of posts."""
+
+from lxml import etree
+
+from engines.inference.text_processing import format_posts_for_llm
+
+
+def test_format_posts_for_llm_escapes_content_and_attributes():
+    posts = [
+        {"id": 'a"1', "url": "https://x.test/?a=1&b=<2>", "text": "quote </content></post> & <b>"},
+        {"id": "b'2", "url": None, "text": "plain"},
+    ]
+    batch = etree.fromstring(format_posts_for_llm(posts))
+
+    # The markup parses back to exactly the posts that went in
+    assert [post.get("id") for post in batch] == ['a"1', "b'2"]
+    assert [post.get("url") for post in batch] == ["https://x.test/?a=1&b=<2>", ""]
+    assert [post.findtext("content") for post in batch] == ["quote </content></post> & <b>", "plain"]
+